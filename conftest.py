@@ -3,13 +3,90 @@ Pytest configuration and shared fixtures for all tests.
 This ensures database connections are properly mocked for all tests.
 """
 import pytest
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 
 # Global patch that stays active for the entire test session
 _connect_db_patcher = None
 _default_mock_client = None
 
 
+class FakeCursor(list):
+    """A result cursor over no documents; chaining calls return itself."""
+
+    def skip(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def batch_size(self, *args, **kwargs):
+        return self
+
+
+class FakeCollection:
+    """An empty collection: reads find nothing, writes report success."""
+
+    def find(self, *args, **kwargs):
+        return FakeCursor()
+
+    def find_one(self, *args, **kwargs):
+        return None
+
+    def count_documents(self, *args, **kwargs):
+        return 0
+
+    def distinct(self, *args, **kwargs):
+        return []
+
+    def insert_one(self, *args, **kwargs):
+        return SimpleNamespace(acknowledged=True, inserted_id=None)
+
+    def insert_many(self, docs, *args, **kwargs):
+        return SimpleNamespace(acknowledged=True, inserted_ids=[None] * len(docs))
+
+    def update_one(self, *args, **kwargs):
+        return SimpleNamespace(acknowledged=True, matched_count=0, modified_count=0)
+
+    def delete_one(self, *args, **kwargs):
+        return SimpleNamespace(acknowledged=True, deleted_count=0)
+
+    def delete_many(self, *args, **kwargs):
+        return SimpleNamespace(acknowledged=True, deleted_count=0)
+
+
+class FakeDatabase:
+    """Every collection in the database is the same empty FakeCollection."""
+
+    def __init__(self):
+        self._collection = FakeCollection()
+
+    def __getitem__(self, name):
+        return self._collection
+
+    def get_collection(self, name):
+        return self._collection
+
+
+class FakeClient:
+    """
+    Lightweight stand-in for a MongoClient used when a test doesn't patch
+    the DB. Tests that need to assert on calls patch
+    `data.db_connect.client` with a MagicMock instead.
+    """
+
+    def __init__(self):
+        self._db = FakeDatabase()
+        # The readyz endpoint pings the server (used by server tests)
+        self.admin = SimpleNamespace(command=lambda *args, **kwargs: {"ok": 1})
+
+    def __getitem__(self, name):
+        return self._db
+
+
 def pytest_configure(config):
     """
     Called before tests are collected - set up global mocks.
@@ -17,16 +94,7 @@ def pytest_configure(config):
     """
     global _connect_db_patcher, _default_mock_client
 
-    # Create a default mock client with proper chain setup
-    _default_mock_client = MagicMock()
-    default_mock_db = MagicMock()
-    default_mock_collection = MagicMock()
-
-    _default_mock_client.__getitem__.return_value = default_mock_db
-    default_mock_db.__getitem__.return_value = default_mock_collection
-
-    # Mock the admin.command for readyz endpoint (used by server tests)
-    _default_mock_client.admin.command.return_value = {"ok": 1}
+    _default_mock_client = FakeClient()
 
     # Patch connect_db at the module level so it's ALWAYS mocked
     # This must happen before any imports that use db_connect
@@ -50,18 +118,24 @@ def pytest_unconfigure(config):
     dbc.client = None
 
 
-@pytest.fixture(autouse=True)
-def ensure_mock_client():
+@pytest.fixture(autouse=True, scope="session")
+def mock_client_installed():
     """
-    Ensure client is set to a mock before each test.
-    This runs before every test and ensures client is not None.
+    Check once per session that pytest_configure installed the mock client.
+    Tests that need a different client patch `data.db_connect.client` and
+    the patch restores this default when it exits.
     """
     import data.db_connect as dbc
 
-    # Ensure client is set (tests that patch client will override this)
-    if dbc.client is None and _default_mock_client:
-        dbc.client = _default_mock_client
+    assert dbc.client is _default_mock_client
     yield
-    # Reset after test
-    if dbc.client is None and _default_mock_client:
-        dbc.client = _default_mock_client
+
+
+@pytest.fixture
+def mock_collection():
+    """
+    Patch `data.db_connect.client` for one test and return the collection
+    mock that every `client[db][collection]` lookup resolves to.
+    """
+    with patch('data.db_connect.client') as mock_client:
+        yield mock_client.__getitem__.return_value.__getitem__.return_value
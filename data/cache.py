@@ -5,36 +5,56 @@ swapped or extended later without touching callers.
 """
 from __future__ import annotations
 
-from collections import OrderedDict
-from typing import Any, Hashable, Optional
+import os
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# How long list and search results stay cached. Writes clear the cache
+# in the process that made them; the TTL bounds how stale other worker
+# processes can get. Override with LIST_CACHE_TTL_SECONDS.
+DEFAULT_LIST_CACHE_TTL_SECONDS = 60.0
 
 
 class LRUCache:
     """A tiny LRU cache with a max size.
 
+    Backed by a plain dict, which preserves insertion order: the first
+    key is always the least-recently-used one.
+
     This is process-local and not safe for multi-process sharing,
-    which is acceptable for this educational project.
+    which is acceptable for this educational project. Pass a ttl (in
+    seconds) where entries must not outlive writes made by other processes.
     """
 
-    def __init__(self, maxsize: int = 128):
+    def __init__(self, maxsize: int = 128, evict_batch: Optional[int] = None,
+                 ttl: Optional[float] = None):
         self.maxsize = maxsize
-        self._store: "OrderedDict[Hashable, Any]" = OrderedDict()
+        # How many LRU entries to drop at once when full, so bursts of
+        # inserts don't pay the eviction bookkeeping on every set.
+        self.evict_batch = evict_batch or max(1, maxsize // 8)
+        self.ttl = ttl
+        # key -> (value, monotonic expiry time or None)
+        self._store: Dict[Hashable, Tuple[Any, Optional[float]]] = {}
 
     def get(self, key: Hashable) -> Optional[Any]:
         if key not in self._store:
             return None
         # Mark as recently used
-        value = self._store.pop(key)
-        self._store[key] = value
+        value, expires_at = self._store.pop(key)
+        if expires_at is not None and time.monotonic() >= expires_at:
+            return None
+        self._store[key] = (value, expires_at)
         return value
 
     def set(self, key: Hashable, value: Any) -> None:
         if key in self._store:
             self._store.pop(key)
         elif len(self._store) >= self.maxsize:
-            # evict least-recently-used
-            self._store.popitem(last=False)
-        self._store[key] = value
+            # evict a batch of least-recently-used entries
+            for _ in range(min(self.evict_batch, len(self._store))):
+                self._store.pop(next(iter(self._store)))
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        self._store[key] = (value, expires_at)
 
     def invalidate(self, key: Hashable) -> None:
         self._store.pop(key, None)
@@ -43,7 +63,20 @@ class LRUCache:
         self._store.clear()
 
 
+LIST_CACHE_TTL_SECONDS = float(
+    os.getenv("LIST_CACHE_TTL_SECONDS", DEFAULT_LIST_CACHE_TTL_SECONDS)
+)
+
 # Singleton caches for common lookups
 country_by_code_cache = LRUCache(maxsize=256)
+# Country codes confirmed to exist, for foreign-key checks
+country_code_exists_cache = LRUCache(maxsize=1024)
 state_by_code_cache = LRUCache(maxsize=512)
 city_by_name_state_cache = LRUCache(maxsize=1024)
+# City search results; cleared on any city write here, expired like the lists
+city_search_cache = LRUCache(maxsize=64, ttl=LIST_CACHE_TTL_SECONDS)
+# Whole-collection country reads; cleared on any country write here and
+# expired after the TTL so writes from other processes show up
+country_list_cache = LRUCache(maxsize=4, ttl=LIST_CACHE_TTL_SECONDS)
+# Whole-collection state reads; same invalidation as country_list_cache
+state_list_cache = LRUCache(maxsize=4, ttl=LIST_CACHE_TTL_SECONDS)
@@ -3,11 +3,16 @@ This module provides data layer operations for cities.
 All city-related database operations should go through this module.
 """
 
+import re
+from typing import Iterator
+
+import data.countries as countries
 import data.db_connect as dbc
+import data.states as states
 from data.coordinates import Coordinates
 from data.utils import sanitize_string, sanitize_code
 from datetime import UTC, datetime
-from data.cache import city_by_name_state_cache
+from data.cache import city_by_name_state_cache, city_search_cache
 
 CITIES_COLLECT = "cities"
 
@@ -22,6 +27,7 @@ LONGITUDE = "longitude"
 CREATED_AT = "created_at"
 UPDATED_AT = "updated_at"
 REQUIRED_FIELDS = [CITY_NAME, COUNTRY_CODE]
+_REQUIRED_SET = frozenset(REQUIRED_FIELDS)
 OPTIONAL_FIELDS = [STATE_CODE, POPULATION, AREA_KM2, COORDINATES]
 
 TEST_CITY = {
@@ -54,6 +60,20 @@ def get_cities_by_country(country_code: str) -> list:
     return dbc.read_filtered(CITIES_COLLECT, {COUNTRY_CODE: country_code})
 
 
+def count_cities_by_country(country_code: str, limit: int = 0) -> int:
+    """
+    Returns how many cities belong to a country, counted in the DB
+    """
+    return dbc.count(CITIES_COLLECT, {COUNTRY_CODE: country_code}, limit=limit)
+
+
+def count_cities_by_state(state_code: str, limit: int = 0) -> int:
+    """
+    Returns how many cities belong to a state, counted in the DB
+    """
+    return dbc.count(CITIES_COLLECT, {STATE_CODE: state_code}, limit=limit)
+
+
 def get_cities_by_state(state_code: str) -> list:
     """
     Returns a list of all cities within a specific state
@@ -93,43 +113,54 @@ def get_city_by_name_and_country(name: str, country_code: str) -> dict | None:
     return dbc.read_one(CITIES_COLLECT, {CITY_NAME: name, COUNTRY_CODE: country_code})
 
 
+def _city_key(name: str, state_code: str) -> tuple:
+    """
+    Canonical (name, state_code) key for city_by_name_state_cache.
+    Uses the same normalization add_city applies before storing a city.
+    """
+    return sanitize_string(name), sanitize_code(state_code)
+
+
 def get_city_by_name_and_state(name: str, state_code: str) -> dict | None:
     """
     Get a specific city by its name and state code.
     This is the most precise lookup for cities within states.
     """
-    key = (name, state_code.upper())
+    key = _city_key(name, state_code)
     cached = city_by_name_state_cache.get(key)
     if cached is not None:
         return cached
 
-    city = dbc.read_one(
-        CITIES_COLLECT, {CITY_NAME: name, STATE_CODE: state_code.upper()}
-    )
+    city_name, code = key
+    city = dbc.read_one(CITIES_COLLECT, {CITY_NAME: city_name, STATE_CODE: code})
     if city is not None:
         city_by_name_state_cache.set(key, city)
     return city
 
 
-def get_cities_filtered(
+def _name_regex(name: str) -> dict:
+    # Partial case-insensitive match; escape so user input is matched literally
+    return {"$regex": re.escape(name.strip()), "$options": "i"}
+
+
+def _cities_query(
     name=None, state_code=None, country_code=None, min_pop=None, max_pop=None
-) -> list:
+) -> dict:
     """
-    Returns a list of cities filtered by multiple optional criteria.
+    Build the Mongo filter shared by get_cities_filtered and iter_cities_filtered.
     """
     query = {}
 
-    # Partial case-insensitive match
     if name and name.strip():
-        query[CITY_NAME] = {"$regex": name.strip(), "$options": "i"}
+        query[CITY_NAME] = _name_regex(name)
 
     # Exact match for state code
     if state_code and state_code.strip():
-        query[STATE_CODE] = state_code.upper().strip()
+        query[STATE_CODE] = sanitize_code(state_code)
 
     # Exact match for country code
     if country_code and country_code.strip():
-        query[COUNTRY_CODE] = country_code.upper().strip()
+        query[COUNTRY_CODE] = sanitize_code(country_code)
 
     # Population
     if min_pop is not None or max_pop is not None:
@@ -140,17 +171,39 @@ def get_cities_filtered(
             pop_query["$lte"] = max_pop
         query[POPULATION] = pop_query
 
+    return query
+
+
+def get_cities_filtered(
+    name=None, state_code=None, country_code=None, min_pop=None, max_pop=None
+) -> list:
+    """
+    Returns a list of cities filtered by multiple optional criteria.
+    """
+    query = _cities_query(name, state_code, country_code, min_pop, max_pop)
     return dbc.read_filtered(CITIES_COLLECT, query)
 
 
-def add_city(city_data: dict) -> bool:
+def iter_cities_filtered(
+    name=None, state_code=None, country_code=None, min_pop=None, max_pop=None
+) -> Iterator[dict]:
     """
-    Add a new city to the database
-    Returns True if successful, False otherwise
+    Streaming variant of get_cities_filtered: yields cities off the cursor
+    instead of building a list.
     """
-    for field in REQUIRED_FIELDS:
-        if field not in city_data:
-            raise ValueError(f"Missing required field: {field}")
+    query = _cities_query(name, state_code, country_code, min_pop, max_pop)
+    return dbc.read_iter(CITIES_COLLECT, query)
+
+
+def _sanitize_new_city(city_data: dict) -> None:
+    """
+    Check required fields and sanitize a new city's fields in-place.
+    """
+    missing = _REQUIRED_SET - city_data.keys()
+    if missing:
+        # Report the first missing field in declaration order
+        field = next(f for f in REQUIRED_FIELDS if f in missing)
+        raise ValueError(f"Missing required field: {field}")
 
     # Sanitize string fields
     if CITY_NAME in city_data:
@@ -162,27 +215,38 @@ def add_city(city_data: dict) -> bool:
     if COORDINATES in city_data:
         city_data[COORDINATES] = _validate_coordinates(city_data[COORDINATES])
 
+    if city_data.get(POPULATION, 0) < 0:
+        raise ValueError("Population cannot be negative")
+
+    if city_data.get(AREA_KM2, 0) < 0:
+        raise ValueError("Area cannot be negative")
+
+
+def add_city(city_data: dict) -> bool:
+    """
+    Add a new city to the database
+    Returns True if successful, False otherwise
+    """
+    _sanitize_new_city(city_data)
+
     # Validate that state_code exists if provided
     if STATE_CODE in city_data and city_data[STATE_CODE]:
-        import data.states as states_module
-
-        if not states_module.state_exists(city_data[STATE_CODE]):
+        if not states.state_exists(city_data[STATE_CODE]):
             raise ValueError(
                 f"State with code '{city_data[STATE_CODE]}' does not exist"
             )
 
     # Validate that country_code exists
-    import data.countries as countries_module
-
-    if not countries_module.country_exists(city_data[COUNTRY_CODE]):
+    if not countries.country_exists(city_data[COUNTRY_CODE]):
         raise ValueError(
             f"Country with code '{city_data[COUNTRY_CODE]}' does not exist"
         )
 
     # Check for duplicate: same name in same state (if state provided)
     if STATE_CODE in city_data:
-        existing = get_city_by_name_and_state(
-            city_data[CITY_NAME], city_data[STATE_CODE]
+        existing = dbc.exists(
+            CITIES_COLLECT,
+            {CITY_NAME: city_data[CITY_NAME], STATE_CODE: city_data[STATE_CODE]},
         )
         if existing:
             raise ValueError(
@@ -190,20 +254,15 @@ def add_city(city_data: dict) -> bool:
             )
     else:
         # If no state, check by name and country
-        existing = get_city_by_name_and_country(
-            city_data[CITY_NAME], city_data[COUNTRY_CODE]
+        existing = dbc.exists(
+            CITIES_COLLECT,
+            {CITY_NAME: city_data[CITY_NAME], COUNTRY_CODE: city_data[COUNTRY_CODE]},
         )
         if existing:
             raise ValueError(
                 f"City '{city_data[CITY_NAME]}' already exists in country '{city_data[COUNTRY_CODE]}'"
             )
 
-    if city_data.get(POPULATION, 0) < 0:
-        raise ValueError("Population cannot be negative")
-
-    if city_data.get(AREA_KM2, 0) < 0:
-        raise ValueError("Area cannot be negative")
-
     # Timestamps
     now = datetime.now(UTC)
     city_data["created_at"] = now
@@ -211,18 +270,119 @@ def add_city(city_data: dict) -> bool:
 
     result = dbc.create(CITIES_COLLECT, city_data)
     if result.acknowledged:
-        key = (city_data[CITY_NAME], city_data.get(STATE_CODE, "").upper())
+        key = _city_key(city_data[CITY_NAME], city_data.get(STATE_CODE, ""))
         city_by_name_state_cache.set(key, city_data)
+        city_search_cache.clear()
         return True
     return False
 
 
+def _drop_duplicate_cities(cities_data: list) -> list:
+    """
+    Return the cities add_city would accept one after another, using a
+    single read for the ones already stored.
+    """
+    clauses = [
+        {CITY_NAME: city_data[CITY_NAME], STATE_CODE: city_data[STATE_CODE]}
+        if city_data.get(STATE_CODE)
+        else {CITY_NAME: city_data[CITY_NAME], COUNTRY_CODE: city_data[COUNTRY_CODE]}
+        for city_data in cities_data
+    ]
+    existing = dbc.read_filtered(
+        CITIES_COLLECT,
+        {"$or": clauses},
+        projection={CITY_NAME: 1, STATE_CODE: 1, COUNTRY_CODE: 1},
+    )
+
+    in_state = set()
+    in_country = set()
+
+    def record(city):
+        if city.get(STATE_CODE):
+            in_state.add((city[CITY_NAME], city[STATE_CODE]))
+        in_country.add((city[CITY_NAME], city[COUNTRY_CODE]))
+
+    for city in existing:
+        record(city)
+
+    new_cities = []
+    for city_data in cities_data:
+        if city_data.get(STATE_CODE):
+            seen = (city_data[CITY_NAME], city_data[STATE_CODE]) in in_state
+        else:
+            seen = (city_data[CITY_NAME], city_data[COUNTRY_CODE]) in in_country
+        if not seen:
+            record(city_data)
+            new_cities.append(city_data)
+    return new_cities
+
+
+def add_cities_bulk(cities_data: list) -> int:
+    """
+    Add many cities with a constant number of round-trips.
+    Country and state codes are validated with one query each, then all
+    cities are inserted with a single insert_many. Raises ValueError (and
+    inserts nothing) if any city is invalid. Cities add_city would reject
+    as duplicates (same name in the state, or for cities without a state,
+    same name in the country) are skipped, whether they already exist or
+    repeat earlier in the batch.
+    Returns the number of cities inserted.
+    """
+    if not cities_data:
+        return 0
+
+    for city_data in cities_data:
+        _sanitize_new_city(city_data)
+
+    country_codes = {city_data[COUNTRY_CODE] for city_data in cities_data}
+    state_codes = {
+        city_data[STATE_CODE] for city_data in cities_data if city_data.get(STATE_CODE)
+    }
+    known_countries = set(dbc.distinct(
+        countries.COUNTRIES_COLLECT,
+        countries.COUNTRY_CODE,
+        {countries.COUNTRY_CODE: {"$in": sorted(country_codes)}},
+    ))
+    known_states = set()
+    if state_codes:
+        known_states = set(dbc.distinct(
+            states.STATES_COLLECT,
+            states.STATE_CODE,
+            {states.STATE_CODE: {"$in": sorted(state_codes)}},
+        ))
+
+    for city_data in cities_data:
+        if city_data.get(STATE_CODE) and city_data[STATE_CODE] not in known_states:
+            raise ValueError(
+                f"State with code '{city_data[STATE_CODE]}' does not exist"
+            )
+        if city_data[COUNTRY_CODE] not in known_countries:
+            raise ValueError(
+                f"Country with code '{city_data[COUNTRY_CODE]}' does not exist"
+            )
+
+    new_cities = _drop_duplicate_cities(cities_data)
+    if not new_cities:
+        return 0
+
+    # Timestamps
+    now = datetime.now(UTC)
+    for city_data in new_cities:
+        city_data[CREATED_AT] = now
+        city_data[UPDATED_AT] = now
+
+    inserted = dbc.create_many(CITIES_COLLECT, new_cities, ordered=False)
+    if inserted:
+        city_search_cache.clear()
+    return inserted
+
+
 def update_city(name: str, state_code: str, update_data: dict) -> bool:
     """
     Update a city by its name and state code
     Returns True if successful, False otherwise
     """
-    if not get_city_by_name_and_state(name, state_code):
+    if not city_exists(name, state_code=state_code):
         return False
 
     # Sanitize string fields in update
@@ -238,15 +398,18 @@ def update_city(name: str, state_code: str, update_data: dict) -> bool:
         del update_data[STATE_CODE]
     # Set updated_at timestamp - strip user value first
     update_data.pop("created_at", None)
-    from datetime import datetime as _dt, UTC
-
-    update_data[UPDATED_AT] = _dt.now(UTC)
+    update_data[UPDATED_AT] = datetime.now(UTC)
 
     result = dbc.update(
         CITIES_COLLECT, {CITY_NAME: name, STATE_CODE: state_code}, update_data
     )
     if result.modified_count > 0:
-        city_by_name_state_cache.invalidate((name, state_code.upper()))
+        # Write-through so the next read of a hot city stays in cache
+        key = _city_key(name, state_code)
+        cached = city_by_name_state_cache.get(key)
+        if cached is not None:
+            city_by_name_state_cache.set(key, {**cached, **update_data})
+        city_search_cache.clear()
         return True
     return False
 
@@ -258,7 +421,7 @@ def update_city_by_name_and_country(
     Update a city by its name and country code (for cities without state_code)
     Returns True if successful, False otherwise
     """
-    if not get_city_by_name_and_country(name, country_code):
+    if not city_exists(name, country_code=country_code):
         return False
 
     # Sanitize string fields in update
@@ -276,7 +439,10 @@ def update_city_by_name_and_country(
     result = dbc.update(
         CITIES_COLLECT, {CITY_NAME: name, COUNTRY_CODE: country_code}, update_data
     )
-    return result.modified_count > 0
+    if result.modified_count > 0:
+        city_search_cache.clear()
+        return True
+    return False
 
 
 def delete_city(name: str, state_code: str) -> bool:
@@ -286,7 +452,8 @@ def delete_city(name: str, state_code: str) -> bool:
     """
     result = dbc.delete(CITIES_COLLECT, {CITY_NAME: name, STATE_CODE: state_code})
     if result > 0:
-        city_by_name_state_cache.invalidate((name, state_code.upper()))
+        city_by_name_state_cache.invalidate(_city_key(name, state_code))
+        city_search_cache.clear()
         return True
     return False
 
@@ -297,7 +464,10 @@ def delete_city_by_name_and_country(name: str, country_code: str) -> bool:
     Returns True if successful, False otherwise
     """
     result = dbc.delete(CITIES_COLLECT, {CITY_NAME: name, COUNTRY_CODE: country_code})
-    return result > 0
+    if result > 0:
+        city_search_cache.clear()
+        return True
+    return False
 
 
 def delete_cities_by_state(state_code: str) -> int:
@@ -305,7 +475,10 @@ def delete_cities_by_state(state_code: str) -> int:
     Delete all cities in a specific state.
     Used for cascading deletes.
     """
-    return dbc.delete_many(CITIES_COLLECT, {STATE_CODE: state_code.upper()})
+    deleted = dbc.delete_many(CITIES_COLLECT, {STATE_CODE: sanitize_code(state_code)})
+    if deleted:
+        city_search_cache.clear()
+    return deleted
 
 
 def delete_cities_by_country(country_code: str) -> int:
@@ -313,7 +486,10 @@ def delete_cities_by_country(country_code: str) -> int:
     Delete all cities in a specific country.
     Used for cascading deletes.
     """
-    return dbc.delete_many(CITIES_COLLECT, {COUNTRY_CODE: country_code.upper()})
+    deleted = dbc.delete_many(CITIES_COLLECT, {COUNTRY_CODE: sanitize_code(country_code)})
+    if deleted:
+        city_search_cache.clear()
+    return deleted
 
 
 def city_exists(name: str, state_code: str = None, country_code: str = None) -> bool:
@@ -323,19 +499,36 @@ def city_exists(name: str, state_code: str = None, country_code: str = None) ->
     Otherwise checks by name + country if country_code is provided
     """
     if state_code:
-        return get_city_by_name_and_state(name, state_code) is not None
+        key = _city_key(name, state_code)
+        if city_by_name_state_cache.get(key) is not None:
+            return True
+        city_name, code = key
+        return dbc.exists(CITIES_COLLECT, {CITY_NAME: city_name, STATE_CODE: code})
     elif country_code:
-        return get_city_by_name_and_country(name, country_code) is not None
+        return dbc.exists(
+            CITIES_COLLECT, {CITY_NAME: name, COUNTRY_CODE: country_code}
+        )
     else:
-        return get_city_by_name(name) is not None
+        return dbc.exists(CITIES_COLLECT, {CITY_NAME: name})
 
 
 def get_cities_by_name(name_query: str) -> list:
     """
     Search cities by name using partial matching (case-insensitive).
     e.g., 'york' will match 'New York'.
-    """
-    # Create a case-insensitive regex pattern
-    # $regex matches anywhere in the string by default
-    query = {CITY_NAME: {"$regex": name_query, "$options": "i"}}
-    return dbc.read_filtered(CITIES_COLLECT, query)
+    Regex metacharacters in the query are matched literally.
+    Results are cached per query until any city is written or
+    LIST_CACHE_TTL_SECONDS passes.
+    """
+    if not name_query or not name_query.strip():
+        return []
+    name = sanitize_string(name_query)
+    key = name.casefold()
+    cached = city_search_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
+    query = {CITY_NAME: {"$regex": re.escape(name), "$options": "i"}}
+    found = dbc.read_filtered(CITIES_COLLECT, query)
+    city_search_cache.set(key, found)
+    return list(found)
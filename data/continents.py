@@ -5,8 +5,9 @@ All continent-related database operations should go through this module.
 
 from datetime import UTC, datetime
 
+import data.countries as countries
 import data.db_connect as dbc
-from data.countries import VALID_CONTINENTS
+from data.countries import VALID_CONTINENTS, VALID_CONTINENT_SET
 
 CONTINENTS_COLLECT = "continents"
 CONTINENT_NAME = "continent_name"
@@ -31,7 +32,7 @@ def add_continent(continent_data: dict) -> bool:
         if field not in continent_data:
             raise ValueError(f"Missing required field: {field}")
 
-    if continent_data[CONTINENT_NAME] not in VALID_CONTINENTS:
+    if continent_data[CONTINENT_NAME] not in VALID_CONTINENT_SET:
         raise ValueError(
             f"Invalid continent: {continent_data[CONTINENT_NAME]}. Must be one of {VALID_CONTINENTS}"
         )
@@ -62,12 +63,10 @@ def update_continent(name: str, update_data: dict) -> bool:
 
 
 def delete_continent(name: str) -> bool:
-    from data.countries import get_countries_by_continent
-
-    countries = get_countries_by_continent(name)
-    if countries:
+    dependents = countries.get_countries_by_continent(name)
+    if dependents:
         raise ValueError(
-            f"Cannot delete: {len(countries)} country/countries reference this continent"
+            f"Cannot delete: {len(dependents)} country/countries reference this continent"
         )
 
     result = dbc.delete(CONTINENTS_COLLECT, {CONTINENT_NAME: name})
@@ -3,12 +3,18 @@ This module provides data layer operations for countries
 All country-related database operations should go through this module
 """
 
+import re
+from typing import Iterator
+
+from pymongo.errors import DuplicateKeyError
+
 import data.db_connect as dbc
 from data.utils import sanitize_string, sanitize_code
-from datetime import datetime
+from datetime import UTC, datetime
 
+import data.cities as cities
 import data.states as states
-from data.cache import country_by_code_cache
+from data.cache import country_by_code_cache, country_code_exists_cache, country_list_cache
 
 COUNTRIES_COLLECT = "countries"
 
@@ -37,10 +43,25 @@ VALID_CONTINENTS = [
     OCEANIA,
     SOUTH_AMERICA,
 ]
+# Set form for O(1) membership checks; the list keeps display order
+VALID_CONTINENT_SET = frozenset(VALID_CONTINENTS)
 
 REQUIRED_FIELDS = [COUNTRY_NAME, COUNTRY_CODE, CONTINENT, CAPITAL]
+_REQUIRED_SET = frozenset(REQUIRED_FIELDS)
 OPTIONAL_FIELDS = [POPULATION, AREA_KM2]
 
+# Field -> normalizer applied to incoming country data
+_SANITIZERS = {
+    COUNTRY_NAME: sanitize_string,
+    COUNTRY_CODE: sanitize_code,
+    CAPITAL: sanitize_string,
+    CONTINENT: sanitize_string,
+}
+# The code is the key and cannot be changed by an update
+_UPDATE_SANITIZERS = {
+    field: fn for field, fn in _SANITIZERS.items() if field != COUNTRY_CODE
+}
+
 TEST_COUNTRY = {
     COUNTRY_NAME: "United States",
     COUNTRY_CODE: "US",
@@ -54,15 +75,29 @@ TEST_COUNTRY = {
 def get_countries() -> list:
     """
     Returns a list of all countries
+    Cached until the next country write or LIST_CACHE_TTL_SECONDS
     """
-    return dbc.read(COUNTRIES_COLLECT)
+    cached = country_list_cache.get("list")
+    if cached is None:
+        cached = dbc.read(COUNTRIES_COLLECT)
+        country_list_cache.set("list", cached)
+    return list(cached)
 
 
-def get_country_dict() -> dict:
+def get_country_dict(projection: dict = None) -> dict:
     """
     Returns countries as a dictionary with country code as key
+    Pass a projection to fetch only some fields, e.g. code -> name
+    The full (unprojected) dict is cached until the next country write
+    or LIST_CACHE_TTL_SECONDS
     """
-    return dbc.read_dict(COUNTRIES_COLLECT, COUNTRY_CODE)
+    if projection is not None:
+        return dbc.read_dict(COUNTRIES_COLLECT, COUNTRY_CODE, projection=projection)
+    cached = country_list_cache.get("dict")
+    if cached is None:
+        cached = dbc.read_dict(COUNTRIES_COLLECT, COUNTRY_CODE, projection=None)
+        country_list_cache.set("dict", cached)
+    return dict(cached)
 
 
 def get_country_by_code(code: str) -> dict:
@@ -81,6 +116,15 @@ def get_country_by_code(code: str) -> dict:
     return country
 
 
+def invalidate_country_cache(code: str) -> None:
+    """
+    Drop a country from the lookup caches so the next read hits the DB
+    """
+    country_by_code_cache.invalidate(code.upper())
+    country_code_exists_cache.invalidate(code.upper())
+    country_list_cache.clear()
+
+
 def get_country_by_name(name: str) -> dict:
     """
     Get a specific country by its name.
@@ -95,9 +139,14 @@ def get_countries_by_continent(continent: str) -> list:
     return dbc.read_filtered(COUNTRIES_COLLECT, {CONTINENT: continent})
 
 
-def get_countries_by_population_range(min_pop: int = None, max_pop: int = None) -> list:
+def get_countries_by_population_range(
+    min_pop: int = None, max_pop: int = None, fields: list = None,
+    limit: int = None, sort: int = None
+) -> list:
     """
     Returns a list of all countries filtered by population range
+    Pass fields to return only those fields of each country
+    Pass sort (1 or -1) to order by population and limit to cap the results
     """
     query = {}
     if min_pop is not None or max_pop is not None:
@@ -108,29 +157,33 @@ def get_countries_by_population_range(min_pop: int = None, max_pop: int = None)
             pop_query["$lte"] = max_pop
         query[POPULATION] = pop_query
 
-    return dbc.read_filtered(COUNTRIES_COLLECT, query)
+    projection = None
+    if fields:
+        projection = {dbc.MONGO_ID: 0, **{field: 1 for field in fields}}
+    return dbc.read_filtered(
+        COUNTRIES_COLLECT, query, projection=projection, limit=limit,
+        sort=[(POPULATION, sort)] if sort else None,
+    )
 
 
-def search_countries_by_name(name_query: str) -> list:
+def search_countries_by_name(name_query: str, limit: int = None) -> list:
     """
     Search countries by name using partial matching (case-insensitive)
-    Returns a list of countries whose names contain the search query
+    Returns a list of countries whose names contain the search query;
+    regex metacharacters in the query are matched literally
+    Pass limit to cap the number of results fetched
     """
     if not name_query or not name_query.strip():
         return []
 
-    # Use MongoDB regex for case-insensitive partial matching
-    search_pattern = {"$regex": name_query.strip(), "$options": "i"}
+    search_pattern = {"$regex": re.escape(name_query.strip()), "$options": "i"}
     query = {COUNTRY_NAME: search_pattern}
-
-    return dbc.read_filtered(COUNTRIES_COLLECT, query)
+    return dbc.read_filtered(COUNTRIES_COLLECT, query, limit=limit)
 
 
-def get_countries_filtered(
-    name=None, continent=None, min_pop=None, max_pop=None
-) -> list:
+def _countries_query(name=None, continent=None, min_pop=None, max_pop=None) -> dict:
     """
-    Returns a list of countries filtered by multiple optional criteria.
+    Build the Mongo filter shared by get_countries_filtered and iter_countries_filtered.
     """
     query = {}
 
@@ -151,118 +204,202 @@ def get_countries_filtered(
             pop_query["$lte"] = max_pop
         query[POPULATION] = pop_query
 
+    return query
+
+
+def get_countries_filtered(
+    name=None, continent=None, min_pop=None, max_pop=None
+) -> list:
+    """
+    Returns a list of countries filtered by multiple optional criteria.
+    """
+    query = _countries_query(name, continent, min_pop, max_pop)
     return dbc.read_filtered(COUNTRIES_COLLECT, query)
 
 
-def add_country(country_data: dict) -> bool:
+def iter_countries_filtered(
+    name=None, continent=None, min_pop=None, max_pop=None
+) -> Iterator[dict]:
     """
-    Add a new country to the database
-    Returns True if successful, False otherwise
+    Streaming variant of get_countries_filtered: yields countries off the
+    cursor instead of building a list.
+    """
+    query = _countries_query(name, continent, min_pop, max_pop)
+    return dbc.read_iter(COUNTRIES_COLLECT, query)
+
+
+def _sanitize_new_country(country_data: dict) -> None:
+    """
+    Check required fields, sanitize and validate a new country in-place.
     """
-    for field in REQUIRED_FIELDS:
-        if field not in country_data:
-            raise ValueError(f"Missing required field: {field}")
+    missing = _REQUIRED_SET - country_data.keys()
+    if missing:
+        # Report the first missing field in declaration order
+        field = next(f for f in REQUIRED_FIELDS if f in missing)
+        raise ValueError(f"Missing required field: {field}")
 
-    # Sanitize string fields
-    if COUNTRY_NAME in country_data:
-        country_data[COUNTRY_NAME] = sanitize_string(country_data[COUNTRY_NAME])
-    if COUNTRY_CODE in country_data:
-        country_data[COUNTRY_CODE] = sanitize_code(country_data[COUNTRY_CODE])
-    if CAPITAL in country_data:
-        country_data[CAPITAL] = sanitize_string(country_data[CAPITAL])
-    if CONTINENT in country_data:
-        country_data[CONTINENT] = sanitize_string(country_data[CONTINENT])
+    for field, sanitize in _SANITIZERS.items():
+        if field in country_data:
+            country_data[field] = sanitize(country_data[field])
 
     # Validate continent
-    if country_data[CONTINENT] not in VALID_CONTINENTS:
+    if country_data[CONTINENT] not in VALID_CONTINENT_SET:
         raise ValueError(
             f"Invalid continent: {country_data[CONTINENT]}. Must be one of {VALID_CONTINENTS}"
         )
 
-    if get_country_by_code(country_data[COUNTRY_CODE]):
-        raise ValueError(
-            f"Country with code {country_data[COUNTRY_CODE]} already exists"
-        )
-
     if country_data.get(POPULATION, 0) < 0:
         raise ValueError("Population cannot be negative")
 
     if country_data.get(AREA_KM2, 0) < 0:
         raise ValueError("Area cannot be negative")
 
-    # Timestamps - strip any user-supplied values and set server-side
+    # Timestamps are set server-side; drop any user-supplied values
     country_data.pop("created_at", None)
     country_data.pop("updated_at", None)
-    from datetime import UTC
+
+
+def add_country(country_data: dict) -> bool:
+    """
+    Add a new country to the database
+    Returns True if successful, False otherwise
+    """
+    _sanitize_new_country(country_data)
+
+    # Checked here as well as by the unique country_code index, which only
+    # exists once the schema init has run against the database
+    if country_exists(country_data[COUNTRY_CODE]):
+        raise ValueError(
+            f"Country with code {country_data[COUNTRY_CODE]} already exists"
+        )
 
     now = datetime.now(UTC)
     country_data["created_at"] = now
     country_data["updated_at"] = now
 
-    result = dbc.create(COUNTRIES_COLLECT, country_data)
+    try:
+        result = dbc.create(COUNTRIES_COLLECT, country_data)
+    except DuplicateKeyError:
+        raise ValueError(
+            f"Country with code {country_data[COUNTRY_CODE]} already exists"
+        )
     if result.acknowledged:
         # New country; ensure cache is populated for fast reads
         key = country_data[COUNTRY_CODE].upper()
         country_by_code_cache.set(key, country_data)
+        country_list_cache.clear()
         return True
     return False
 
 
-def update_country(code: str, update_data: dict) -> bool:
+def add_countries_bulk(countries_data: list) -> int:
     """
-    Update a country by its code
-    Returns True if successful, False otherwise
+    Add many countries with a single insert_many round-trip.
+    Raises ValueError (and inserts nothing) if any country is invalid.
+    Countries whose code already exists, or repeats earlier in the batch,
+    are skipped.
+    Returns the number of countries inserted.
     """
-    if not get_country_by_code(code):
-        return False
+    if not countries_data:
+        return 0
+
+    for country_data in countries_data:
+        _sanitize_new_country(country_data)
+
+    # One $in read rather than relying on the unique country_code index alone
+    codes = {country_data[COUNTRY_CODE] for country_data in countries_data}
+    seen = set(dbc.distinct(
+        COUNTRIES_COLLECT, COUNTRY_CODE, {COUNTRY_CODE: {"$in": sorted(codes)}}
+    ))
+    new_countries = []
+    for country_data in countries_data:
+        if country_data[COUNTRY_CODE] not in seen:
+            seen.add(country_data[COUNTRY_CODE])
+            new_countries.append(country_data)
+    if not new_countries:
+        return 0
+
+    now = datetime.now(UTC)
+    for country_data in new_countries:
+        country_data["created_at"] = now
+        country_data["updated_at"] = now
+
+    inserted = dbc.create_many(COUNTRIES_COLLECT, new_countries, ordered=False)
+    if inserted:
+        country_list_cache.clear()
+    return inserted
+
+
+def _sanitize_country_update(update_data: dict) -> None:
+    """
+    Sanitize and validate the fields of a country update in-place.
+    """
+    for field, sanitize in _UPDATE_SANITIZERS.items():
+        if field in update_data:
+            update_data[field] = sanitize(update_data[field])
 
-    # Sanitize string fields in update
-    if COUNTRY_NAME in update_data:
-        update_data[COUNTRY_NAME] = sanitize_string(update_data[COUNTRY_NAME])
-    if CAPITAL in update_data:
-        update_data[CAPITAL] = sanitize_string(update_data[CAPITAL])
-    if CONTINENT in update_data:
-        update_data[CONTINENT] = sanitize_string(update_data[CONTINENT])
-        if update_data[CONTINENT] not in VALID_CONTINENTS:
-            raise ValueError(
-                f"Invalid continent: {update_data[CONTINENT]}. Must be one of {VALID_CONTINENTS}"
-            )
+    if CONTINENT in update_data and update_data[CONTINENT] not in VALID_CONTINENT_SET:
+        raise ValueError(
+            f"Invalid continent: {update_data[CONTINENT]}. Must be one of {VALID_CONTINENTS}"
+        )
 
     if COUNTRY_CODE in update_data:
         del update_data[COUNTRY_CODE]
 
     # Set updated_at timestamp - strip user value first
     update_data.pop("created_at", None)
-    from datetime import datetime as _dt, UTC
+    update_data["updated_at"] = datetime.now(UTC)
 
-    update_data["updated_at"] = _dt.now(UTC)
+
+def update_country(code: str, update_data: dict) -> bool:
+    """
+    Update a country by its code
+    Returns True if successful, False otherwise
+    """
+    _sanitize_country_update(update_data)
 
     result = dbc.update(COUNTRIES_COLLECT, {COUNTRY_CODE: code}, update_data)
+    if result.matched_count == 0:
+        return False
     if result.modified_count > 0:
         # Invalidate so the next read repopulates from DB
-        country_by_code_cache.invalidate(code.upper())
+        invalidate_country_cache(code)
         return True
     return False
 
 
+def update_countries_bulk(updates: dict) -> int:
+    """
+    Apply many country updates, given as {code: update_data}, with a
+    single bulk_write round-trip.
+    Returns the number of countries modified.
+    """
+    if not updates:
+        return 0
+
+    for update_data in updates.values():
+        _sanitize_country_update(update_data)
+
+    modified = dbc.update_bulk(COUNTRIES_COLLECT, [
+        ({COUNTRY_CODE: code}, update_data) for code, update_data in updates.items()
+    ])
+    for code in updates:
+        invalidate_country_cache(code)
+    return modified
+
+
 def get_dependent_states_count(country_code: str) -> int:
     """
     Check how many states belong to this country.
     """
-    import data.states as states
-
-    states_list = states.get_states_by_country(country_code)
-    return len(states_list)
+    return states.count_states_by_country(country_code)
 
 
 def get_dependent_cities_count(country_code: str) -> int:
     """
     Check how many cities belong to this country.
     """
-    import data.cities as cities
-
-    cities_list = cities.get_cities_by_country(country_code)
-    return len(cities_list)
+    return cities.count_cities_by_country(country_code)
 
 
 def get_country_delete_impact(country_code: str) -> dict | None:
@@ -294,12 +431,10 @@ def can_delete_country(country_code: str) -> tuple[bool, str]:
     Check if country can be safely deleted.
     Returns (can_delete: bool, reason: str)
     """
-    delete_impact = get_country_delete_impact(country_code)
-    if delete_impact is None:
-        return True, ""
-
-    dependent_count = delete_impact["states"]
-    if delete_impact["blocked"]:
+    # Only dependent states block a delete, so count just those in one
+    # round-trip rather than building the full delete impact
+    dependent_count = get_dependent_states_count(country_code.upper())
+    if dependent_count > 0:
         return (
             False,
             f"Cannot delete: {dependent_count} state(s) depend on this country",
@@ -317,7 +452,7 @@ def delete_country(code: str) -> bool:
 
     result = dbc.delete(COUNTRIES_COLLECT, {COUNTRY_CODE: code})
     if result > 0:
-        country_by_code_cache.invalidate(code.upper())
+        invalidate_country_cache(code)
         return True
     return False
 
@@ -330,7 +465,7 @@ def delete_country_cascade(code: str) -> bool:
 
     result = dbc.delete(COUNTRIES_COLLECT, {COUNTRY_CODE: code.upper()})
     if result > 0:
-        country_by_code_cache.invalidate(code.upper())
+        invalidate_country_cache(code)
         return True
     return False
 
@@ -339,4 +474,15 @@ def country_exists(code: str) -> bool:
     """
     Check if a country exists by its code
     """
-    return get_country_by_code(code) is not None
+    key = code.upper()
+    if country_code_exists_cache.get(key) or country_by_code_cache.get(key) is not None:
+        return True
+    # Covered by the unique country_code index, so no document is fetched
+    found = dbc.read_one(
+        COUNTRIES_COLLECT, {COUNTRY_CODE: key},
+        projection={dbc.MONGO_ID: 0, COUNTRY_CODE: 1},
+    )
+    if found is None:
+        return False
+    country_code_exists_cache.set(key, True)
+    return True
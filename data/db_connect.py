@@ -6,12 +6,14 @@ We may be required to use a new database at any point.
 import logging
 import os
 from functools import wraps
+from itertools import chain
 import certifi
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import pymongo as pm
 from dotenv import load_dotenv
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from pymongo.errors import BulkWriteError, ConnectionFailure, ServerSelectionTimeoutError
+from pymongo import UpdateOne
 from pymongo.results import InsertOneResult, UpdateResult
 
 LOCAL = "0"
@@ -23,10 +25,19 @@ client = None
 
 MONGO_ID = "_id"
 
+DUPLICATE_KEY_ERROR = 11000
+
 DEFAULT_SERVER_SELECTION_TIMEOUT_MS = 5000
 DEFAULT_CONNECT_TIMEOUT_MS = 5000
 DEFAULT_SOCKET_TIMEOUT_MS = 20000  
 
+DEFAULT_MAX_POOL_SIZE = 50
+DEFAULT_MIN_POOL_SIZE = 0
+DEFAULT_MAX_IDLE_TIME_MS = 30000
+DEFAULT_WAIT_QUEUE_TIMEOUT_MS = 5000
+
+DEFAULT_BATCH_SIZE = 1000
+
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -41,6 +52,12 @@ def connect_db() -> pm.MongoClient:
     - MONGO_SERVER_SELECTION_TIMEOUT_MS (default: 5000ms)
     - MONGO_CONNECT_TIMEOUT_MS (default: 5000ms)
     - MONGO_SOCKET_TIMEOUT_MS (default: 20000ms)
+
+    Connection pool sizing can be configured the same way:
+    - MONGO_MAX_POOL_SIZE (default: 50)
+    - MONGO_MIN_POOL_SIZE (default: 0)
+    - MONGO_MAX_IDLE_TIME_MS (default: 30000ms)
+    - MONGO_WAIT_QUEUE_TIMEOUT_MS (default: 5000ms)
     """
     global client
     if client is None:
@@ -57,11 +74,17 @@ def connect_db() -> pm.MongoClient:
             os.getenv("MONGO_SOCKET_TIMEOUT_MS", DEFAULT_SOCKET_TIMEOUT_MS)
         )
         
-        # Common connection options (timeouts only)
+        # Common connection options (timeouts and pool sizing)
         base_connection_options = {
             "serverSelectionTimeoutMS": server_selection_timeout_ms,
             "connectTimeoutMS": connect_timeout_ms,
             "socketTimeoutMS": socket_timeout_ms,
+            "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", DEFAULT_MAX_POOL_SIZE)),
+            "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", DEFAULT_MIN_POOL_SIZE)),
+            "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", DEFAULT_MAX_IDLE_TIME_MS)),
+            "waitQueueTimeoutMS": int(
+                os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", DEFAULT_WAIT_QUEUE_TIMEOUT_MS)
+            ),
         }
         
         if os.getenv("CLOUD_MONGO", LOCAL) == CLOUD:
@@ -114,6 +137,9 @@ def ensure_connection(func: Callable) -> Callable:
             return func(*args, **kwargs)
         except (ConnectionFailure, ServerSelectionTimeoutError):
             logger.info("Connection lost. Reconnecting...")
+            # Drop the reference rather than closing it: the client is
+            # shared, and closing it would fail other threads' in-flight
+            # queries with InvalidOperation
             client = None
             client = connect_db()
             return func(*args, **kwargs)
@@ -135,20 +161,62 @@ def create(collection: str, doc: dict, db: str = SE_DB) -> InsertOneResult:
     """
     Insert a single doc into collection.
     """
-    logger.debug(f"Creating document in collection '{collection}' of database '{db}'")
+    logger.debug("Creating document in collection '%s' of database '%s'", collection, db)
     return client[db][collection].insert_one(doc)
 
 
 @ensure_connection
-def read_one(collection: str, filt: dict, db: str = SE_DB) -> Optional[dict]:
+def create_many(collection: str, docs: List[dict], db: str = SE_DB, ordered: bool = True) -> int:
+    """
+    Insert many docs into collection with a single round-trip.
+    With ordered=False, docs rejected as duplicate keys are skipped and
+    the rest are still inserted. An ordered insert stops at the first
+    error, so there any BulkWriteError is raised.
+    Returns the count of inserted docs.
+    """
+    logger.debug("Creating %d documents in collection '%s' of database '%s'", len(docs), collection, db)
+    try:
+        result = client[db][collection].insert_many(docs, ordered=ordered)
+    except BulkWriteError as err:
+        write_errors = err.details.get("writeErrors", [])
+        if ordered or any(e.get("code") != DUPLICATE_KEY_ERROR for e in write_errors):
+            raise
+        return err.details.get("nInserted", 0)
+    return len(result.inserted_ids)
+
+
+@ensure_connection
+def read_one(collection: str, filt: dict, db: str = SE_DB,
+             projection: Optional[dict] = None) -> Optional[dict]:
     """
     Find with a filter and return on the first doc found.
+    Pass a projection to fetch only the fields the caller needs.
     Return None if not found.
     """
-    for doc in client[db][collection].find(filt):
+    doc = client[db][collection].find_one(filt, projection)
+    if doc is not None:
         convert_mongo_id(doc)
-        return doc
-    return None
+    return doc
+
+
+@ensure_connection
+def exists(collection: str, filt: dict, db: str = SE_DB) -> bool:
+    """
+    Return True if at least one doc matches the filter.
+    Only the _id is projected, so no document payload is transferred.
+    """
+    return client[db][collection].find_one(filt, {MONGO_ID: 1}) is not None
+
+
+@ensure_connection
+def count(collection: str, filt: dict, db: str = SE_DB, limit: int = 0) -> int:
+    """
+    Count docs matching the filter on the server, without fetching them.
+    A positive limit stops counting once that many docs are found.
+    """
+    if limit:
+        return client[db][collection].count_documents(filt, limit=limit)
+    return client[db][collection].count_documents(filt)
 
 
 @ensure_connection
@@ -157,7 +225,7 @@ def delete(collection: str, filt: dict, db: str = SE_DB) -> int:
     Delete a single document matching the filter.
     Returns the count of deleted documents (0 or 1).
     """
-    logger.debug(f"Deleting document from collection '{collection}' with filter: {filt}")
+    logger.debug("Deleting document from collection '%s' with filter: %s", collection, filt)
     del_result = client[db][collection].delete_one(filt)
     return del_result.deleted_count
 
@@ -181,6 +249,22 @@ def update(collection: str, filters: dict, update_dict: dict, db: str = SE_DB) -
     return client[db][collection].update_one(filters, {"$set": update_dict})
 
 
+@ensure_connection
+def update_bulk(collection: str, updates: List[tuple], db: str = SE_DB, ordered: bool = False) -> int:
+    """
+    Apply many (filters, update_dict) pairs with a single bulk_write.
+    Returns the count of modified documents.
+    """
+    if not updates:
+        return 0
+    logger.debug("Bulk updating %d documents in collection '%s'", len(updates), collection)
+    result = client[db][collection].bulk_write(
+        [UpdateOne(filters, {"$set": update_dict}) for filters, update_dict in updates],
+        ordered=ordered,
+    )
+    return result.modified_count
+
+
 def _apply_pagination(cursor: Any, limit: Optional[int] = None, offset: Optional[int] = None) -> Any:
     """
     Apply pagination (skip/limit) to a MongoDB cursor.
@@ -192,53 +276,106 @@ def _apply_pagination(cursor: Any, limit: Optional[int] = None, offset: Optional
     return cursor
 
 
+def _read_projection(projection: Optional[dict], no_id: bool) -> Optional[dict]:
+    """
+    Exclude _id on the server rather than deleting it from every doc.
+    """
+    if not no_id:
+        return projection
+    return {MONGO_ID: 0, **(projection or {})}
+
+
+def _collect(cursor: Any, no_id: bool) -> List[Dict[str, Any]]:
+    """
+    Materialize a cursor; _id is only present (and converted) when kept.
+    """
+    docs = list(cursor)
+    if not no_id:
+        for doc in docs:
+            convert_mongo_id(doc)
+    return docs
+
+
 @ensure_connection
-def read(collection: str, db: str = SE_DB, no_id: bool = True, limit: Optional[int] = None, offset: Optional[int] = None) -> List[Dict[str, Any]]:
+def read(collection: str, db: str = SE_DB, no_id: bool = True, limit: Optional[int] = None, offset: Optional[int] = None,
+         projection: Optional[dict] = None) -> List[Dict[str, Any]]:
     """
     Returns a list from the db with optional pagination.
+    Pass a projection to fetch only the fields the caller needs.
     """
-    ret = []
-    cursor = client[db][collection].find()
+    cursor = client[db][collection].find(
+        {}, _read_projection(projection, no_id), batch_size=DEFAULT_BATCH_SIZE
+    )
     cursor = _apply_pagination(cursor, limit, offset)
-    for doc in cursor:
-        if no_id:
-            if MONGO_ID in doc:
-                del doc[MONGO_ID]
-        else:
-            convert_mongo_id(doc)
-        ret.append(doc)
-    return ret
+    return _collect(cursor, no_id)
 
 
 @ensure_connection
 def read_filtered(collection: str, filt: dict, db: str = SE_DB, no_id: bool = True,
-                  limit: Optional[int] = None, offset: Optional[int] = None) -> List[Dict[str, Any]]:
+                  limit: Optional[int] = None, offset: Optional[int] = None,
+                  projection: Optional[dict] = None, sort: Optional[list] = None) -> List[Dict[str, Any]]:
     """
     Returns a filtered list from the db using the provided filt dict.
+    Pass a projection to fetch only the fields the caller needs, and a
+    sort list of (field, direction) pairs to order results on the server.
     """
-    ret = []
-    cursor = client[db][collection].find(filt)
+    cursor = client[db][collection].find(
+        filt, _read_projection(projection, no_id), batch_size=DEFAULT_BATCH_SIZE
+    )
+    if sort:
+        cursor = cursor.sort(sort)
     cursor = _apply_pagination(cursor, limit, offset)
-    for doc in cursor:
-        if no_id:
-            if MONGO_ID in doc:
-                del doc[MONGO_ID]
-        else:
-            convert_mongo_id(doc)
-        ret.append(doc)
-    return ret
+    return _collect(cursor, no_id)
 
 
-def read_dict(collection: str, key: str, db: str = SE_DB, no_id: bool = True) -> Dict[str, Dict[str, Any]]:
+@ensure_connection
+def distinct(collection: str, key: str, filt: Optional[dict] = None, db: str = SE_DB) -> List[Any]:
+    """
+    Returns the distinct values of key among docs matching the filter.
+    """
+    return client[db][collection].distinct(key, filt or {})
+
+
+@ensure_connection
+def read_iter(collection: str, filt: Optional[dict] = None, db: str = SE_DB, no_id: bool = True,
+              batch_size: int = DEFAULT_BATCH_SIZE, projection: Optional[dict] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Returns an iterator over docs matching the filter, read straight off
+    the cursor, so callers that stream results never hold the whole
+    result set in memory.
+    The find and its first batch run here, under ensure_connection, so a
+    lost connection is retried before any doc is handed out.
+    """
+    cursor = iter(client[db][collection].find(
+        filt or {}, _read_projection(projection, no_id)
+    ).batch_size(batch_size))
+    first = next(cursor, None)
+    if first is None:
+        return iter(())
+    docs = chain((first,), cursor)
+    if no_id:
+        return docs
+    return _convert_ids(docs)
+
+
+def _convert_ids(docs: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Convert _id to a string on each doc as it is iterated.
+    """
+    for doc in docs:
+        convert_mongo_id(doc)
+        yield doc
+
+
+@ensure_connection
+def read_dict(collection: str, key: str, db: str = SE_DB, no_id: bool = True,
+              projection: Optional[dict] = None) -> Dict[str, Dict[str, Any]]:
     """
     Read all records from a collection and return as a dictionary
     keyed by the specified field.
+    Pass a projection (which must include key) to fetch only some fields.
     """
-    recs = read(collection, db=db, no_id=no_id)
-    recs_as_dict = {}
-    for rec in recs:
-        recs_as_dict[rec[key]] = rec
-    return recs_as_dict
+    return {rec[key]: rec for rec in read_iter(collection, db=db, no_id=no_id, projection=projection)}
 
 
 @ensure_connection
@@ -247,8 +384,4 @@ def fetch_all_as_dict(key: str, collection: str, db: str = SE_DB) -> Dict[str, D
     Fetch all documents from a collection and return as a dictionary
     keyed by the specified field. Always removes _id field.
     """
-    ret = {}
-    for doc in client[db][collection].find():
-        del doc[MONGO_ID]
-        ret[doc[key]] = doc
-    return ret
+    return read_dict(collection, key, db=db)
@@ -21,6 +21,9 @@ class CONTINENT_ENUM(StrEnum):
     SOUTH_AMERICA = "South America"
 
 
+_CONTINENT_VALUES = [member.value for member in CONTINENT_ENUM]
+
+
 countries_validator = {
     "$jsonSchema": {
         "bsonType": "object",
@@ -37,7 +40,7 @@ countries_validator = {
             "_id": {"bsonType": ["objectId", "string"]},
             "country_name": {"bsonType": "string", "minLength": 1},
             "country_code": {"bsonType": "string", "pattern": "^[A-Z]{2}$"},
-            "continent": {"enum": [member.value for member in CONTINENT_ENUM]},
+            "continent": {"enum": _CONTINENT_VALUES},
             "capital": {"bsonType": "string", "minLength": 1},
             "population": {"bsonType": ["int", "long", "decimal"], "minimum": 0},
             "area_km2": {
@@ -131,7 +134,7 @@ continents_validator = {
         "additionalProperties": False,
         "properties": {
             "_id": {"bsonType": ["objectId", "string"]},
-            "continent_name": {"enum": [m.value for m in CONTINENT_ENUM]},
+            "continent_name": {"enum": _CONTINENT_VALUES},
             "created_at": {"bsonType": ["date"], "description": "Creation timestamp"},
             "updated_at": {"bsonType": ["date"], "description": "Last update timestamp"},
         },
@@ -144,17 +147,40 @@ def get_db():
     return client[db_name]
 
 
-def ensure_collection(name: str, validator: dict[str, Any], db=None):
+def list_collection_options(db=None) -> dict[str, dict[str, Any]]:
+    """Map each existing collection name to its options (validator etc.)."""
     database = db or get_db()
-    exists = name in database.list_collection_names()
-    if not exists:
+    return {
+        info["name"]: info.get("options", {})
+        for info in database.list_collections()
+    }
+
+
+def _validator_is_current(options: dict[str, Any], validator: dict[str, Any]) -> bool:
+    return (
+        options.get("validator") == validator
+        and options.get("validationAction") == "error"
+        and options.get("validationLevel") == "strict"
+    )
+
+
+def ensure_collection(name: str, validator: dict[str, Any], db=None, existing=None):
+    """
+    Create the collection, or update its validator if it has changed.
+    Pass existing (from list_collection_options) to avoid listing
+    collections again when ensuring several at once.
+    """
+    database = db or get_db()
+    if existing is None:
+        existing = list_collection_options(db=database)
+    if name not in existing:
         database.create_collection(
             name,
             validator=validator,
             validationAction="error",
             validationLevel="strict",
         )
-    else:
+    elif not _validator_is_current(existing[name], validator):
         database.command(
             "collMod",
             name,
@@ -169,25 +195,58 @@ def ensure_indexes(db=None):
     database.get_collection("continents").create_index(
         "continent_name", unique=True, name="uniq_continent_name"
     )
-    database.get_collection("countries").create_index(
+    countries = database.get_collection("countries")
+    countries.create_index(
         "country_code", unique=True, name="uniq_country_code"
     )
-    database.get_collection("states").create_index(
+    countries.create_index("country_name", name="country_name")
+    countries.create_index("population", name="country_population")
+    # Also serves continent-only filters, so no separate continent index.
+    countries.create_index(
+        [("continent", 1), ("population", 1)], name="country_continent_population"
+    )
+    # The unique (country_code, state_code) index serves country_code-only
+    # lookups. State codes are looked up (and kept unique) on their own too,
+    # which that index can't serve.
+    states = database.get_collection("states")
+    states.create_index(
         [("country_code", 1), ("state_code", 1)],
         unique=True,
         name="uniq_state_in_country",
     )
-    database.get_collection("cities").create_index(
+    states.create_index("state_code", unique=True, name="uniq_state_code")
+    # Country first so population ranges scoped to a country use the prefix.
+    states.create_index(
+        [("country_code", 1), ("population", 1)], name="country_pop"
+    )
+    # The unique (country_code, state_code, city_name) index also serves
+    # country_code-only lookups, so no separate country_code index.
+    cities = database.get_collection("cities")
+    cities.create_index(
         [("country_code", 1), ("state_code", 1), ("city_name", 1)],
         unique=True,
         name="uniq_city_name_in_state",
     )
+    cities.create_index(
+        [("city_name", 1), ("state_code", 1)], name="city_name_state_code"
+    )
+    cities.create_index(
+        [("city_name", 1), ("country_code", 1)], name="city_name_country_code"
+    )
+    cities.create_index("state_code", name="city_state_code")
+    cities.create_index("population", name="city_population")
 
 
 def initialize_database_schema(db=None):
     database = db or get_db()
-    ensure_collection("continents", continents_validator, db=database)
-    ensure_collection("countries", countries_validator, db=database)
-    ensure_collection("states", states_validator, db=database)
-    ensure_collection("cities", cities_validator, db=database)
+    existing = list_collection_options(db=database)
+    ensure_collection("continents", continents_validator, db=database, existing=existing)
+    ensure_collection("countries", countries_validator, db=database, existing=existing)
+    ensure_collection("states", states_validator, db=database, existing=existing)
+    ensure_collection("cities", cities_validator, db=database, existing=existing)
     ensure_indexes(db=database)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    # One-shot schema and index setup, e.g. before deploys: python -m data.models
+    initialize_database_schema()
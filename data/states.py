@@ -2,12 +2,15 @@
 This module provides data layer operations for states.
 All state-related database operations should go through this module.
 """
+from pymongo.errors import DuplicateKeyError
+
 import data.db_connect as dbc
 from data.utils import sanitize_string, sanitize_code
-from datetime import datetime
+from datetime import UTC, datetime
+from typing import Iterator
 
 import data.cities as cities
-from data.cache import state_by_code_cache
+from data.cache import state_by_code_cache, state_list_cache
 
 STATES_COLLECT = 'states'
 
@@ -22,6 +25,12 @@ UPDATED_AT = 'updated_at'
 REQUIRED_FIELDS = [STATE_NAME, STATE_CODE, COUNTRY_CODE]
 OPTIONAL_FIELDS = [CAPITAL, POPULATION, AREA_KM2]
 
+# Fields returned by the list reads (what the API's State model exposes);
+# anything else stored on a state stays on the server
+LIST_PROJECTION = {
+    field: 1 for field in REQUIRED_FIELDS + OPTIONAL_FIELDS + [CREATED_AT, UPDATED_AT]
+}
+
 TEST_STATE = {
     STATE_NAME: 'New York',
     STATE_CODE: 'NY',
@@ -35,40 +44,70 @@ TEST_STATE = {
 def get_state_dict() -> dict:
     """
     Returns states as a dictionary with state code as key
+    Cached until the next state write or LIST_CACHE_TTL_SECONDS
     """
-    return dbc.read_dict(STATES_COLLECT, STATE_CODE)
+    cached = state_list_cache.get("dict")
+    if cached is None:
+        cached = dbc.read_dict(STATES_COLLECT, STATE_CODE)
+        state_list_cache.set("dict", cached)
+    return dict(cached)
 
 
-def get_states() -> list:
+def get_states(projection: dict = LIST_PROJECTION) -> list:
     """
     Returns a list of all states
+    The default projection is cached until the next state write
+    or LIST_CACHE_TTL_SECONDS
     """
-    return dbc.read(STATES_COLLECT)
+    if projection != LIST_PROJECTION:
+        return dbc.read(STATES_COLLECT, projection=projection)
+    cached = state_list_cache.get("list")
+    if cached is None:
+        cached = dbc.read(STATES_COLLECT, projection=projection)
+        state_list_cache.set("list", cached)
+    return list(cached)
 
 
-def get_states_by_country(country_code: str) -> list:
+def get_states_by_country(country_code: str, projection: dict = LIST_PROJECTION) -> list:
     """
     Returns a list of all states within a specific country
     """
-    return dbc.read_filtered(STATES_COLLECT, {COUNTRY_CODE: country_code})
+    return dbc.read_filtered(
+        STATES_COLLECT, {COUNTRY_CODE: country_code}, projection=projection)
+
+
+def count_states_by_country(country_code: str, limit: int = 0) -> int:
+    """
+    Returns how many states belong to a country, counted in the DB
+    """
+    return dbc.count(STATES_COLLECT, {COUNTRY_CODE: country_code}, limit=limit)
+
+
+def _population_range(min_pop, max_pop) -> dict:
+    """
+    Builds the {$gte, $lte} population filter, leaving out unset bounds
+    """
+    bounds = (("$gte", min_pop), ("$lte", max_pop))
+    return {op: value for op, value in bounds if value is not None}
 
 
 def get_states_by_population_range(
         min_pop: int = None,
-        max_pop: int = None) -> list:
+        max_pop: int = None,
+        projection: dict = LIST_PROJECTION,
+        country_code: str = None) -> list:
     """
-    Returns a list of all states filtered by population range
+    Returns a list of all states filtered by population range,
+    optionally scoped to one country
     """
     query = {}
-    if min_pop is not None or max_pop is not None:
-        pop_query = {}
-        if min_pop is not None:
-            pop_query["$gte"] = min_pop
-        if max_pop is not None:
-            pop_query["$lte"] = max_pop
+    if country_code:
+        query[COUNTRY_CODE] = country_code.upper()
+    pop_query = _population_range(min_pop, max_pop)
+    if pop_query:
         query[POPULATION] = pop_query
 
-    return dbc.read_filtered(STATES_COLLECT, query)
+    return dbc.read_filtered(STATES_COLLECT, query, projection=projection)
 
 
 def get_state_by_code(code: str) -> dict | None:
@@ -86,6 +125,26 @@ def get_state_by_code(code: str) -> dict | None:
     return state
 
 
+def get_states_by_codes(codes) -> dict:
+    """
+    Returns {state_code: state} for the given codes, fetching every code
+    missing from the cache with a single $in read
+    """
+    keys = {code.upper() for code in codes}
+    found = {}
+    for key in keys:
+        cached = state_by_code_cache.get(key)
+        if cached is not None:
+            found[key] = cached
+
+    missing = keys - found.keys()
+    if missing:
+        for state in dbc.read_iter(STATES_COLLECT, {STATE_CODE: {"$in": sorted(missing)}}):
+            state_by_code_cache.set(state[STATE_CODE], state)
+            found[state[STATE_CODE]] = state
+    return found
+
+
 def get_state_by_name(name: str) -> dict | None:
     """
     Get a specific state by its name.
@@ -93,13 +152,9 @@ def get_state_by_name(name: str) -> dict | None:
     return dbc.read_one(STATES_COLLECT, {STATE_NAME: name})
 
 
-def get_states_filtered(
-        name=None,
-        country_code=None,
-        min_pop=None,
-        max_pop=None) -> list:
+def _states_query(name=None, country_code=None, min_pop=None, max_pop=None) -> dict:
     """
-    Returns a list of states filtered by multiple optional criteria.
+    Build the Mongo filter shared by get_states_filtered and iter_states_filtered.
     """
     query = {}
 
@@ -112,21 +167,41 @@ def get_states_filtered(
         query[COUNTRY_CODE] = country_code.upper().strip()
 
     # Population
-    if min_pop is not None or max_pop is not None:
-        pop_query = {}
-        if min_pop is not None:
-            pop_query["$gte"] = min_pop
-        if max_pop is not None:
-            pop_query["$lte"] = max_pop
+    pop_query = _population_range(min_pop, max_pop)
+    if pop_query:
         query[POPULATION] = pop_query
 
+    return query
+
+
+def get_states_filtered(
+        name=None,
+        country_code=None,
+        min_pop=None,
+        max_pop=None) -> list:
+    """
+    Returns a list of states filtered by multiple optional criteria.
+    """
+    query = _states_query(name, country_code, min_pop, max_pop)
     return dbc.read_filtered(STATES_COLLECT, query)
 
 
-def add_state(state_data: dict) -> bool:
+def iter_states_filtered(
+        name=None,
+        country_code=None,
+        min_pop=None,
+        max_pop=None) -> Iterator[dict]:
     """
-    Add a new state to the database
-    Returns True if successful, False otherwise
+    Streaming variant of get_states_filtered: yields states off the
+    cursor, batch by batch, instead of building a list.
+    """
+    query = _states_query(name, country_code, min_pop, max_pop)
+    return dbc.read_iter(STATES_COLLECT, query, projection=LIST_PROJECTION)
+
+
+def _sanitize_new_state(state_data: dict) -> None:
+    """
+    Check required fields, sanitize and validate a new state in-place.
     """
     for field in REQUIRED_FIELDS:
         if field not in state_data:
@@ -142,40 +217,87 @@ def add_state(state_data: dict) -> bool:
     if CAPITAL in state_data:
         state_data[CAPITAL] = sanitize_string(state_data[CAPITAL])
 
-    if get_state_by_code(state_data[STATE_CODE]):
-        raise ValueError(
-            f"State with code {state_data[STATE_CODE]} already exists")
-
     if state_data.get(POPULATION, 0) < 0:
         raise ValueError("Population cannot be negative")
 
     if state_data.get(AREA_KM2, 0) < 0:
         raise ValueError("Area cannot be negative")
 
-    # Timestamps - strip any user-supplied values and set server-side
+    # Timestamps - strip any user-supplied values; callers set them server-side
     state_data.pop('created_at', None)
     state_data.pop('updated_at', None)
-    from datetime import UTC
+
+
+def add_state(state_data: dict) -> bool:
+    """
+    Add a new state to the database
+    Returns True if successful, False otherwise
+    """
+    _sanitize_new_state(state_data)
+
+    # Checked here as well as by the unique state_code index, which only
+    # exists once the schema init has run against the database
+    if get_state_by_code(state_data[STATE_CODE]):
+        raise ValueError(
+            f"State with code {state_data[STATE_CODE]} already exists")
+
     now = datetime.now(UTC)
     state_data['created_at'] = now
     state_data['updated_at'] = now
 
-    result = dbc.create(STATES_COLLECT, state_data)
+    try:
+        result = dbc.create(STATES_COLLECT, state_data)
+    except DuplicateKeyError:
+        raise ValueError(
+            f"State with code {state_data[STATE_CODE]} already exists")
     if result.acknowledged:
         key = state_data[STATE_CODE].upper()
         state_by_code_cache.set(key, state_data)
+        state_list_cache.clear()
         return True
     return False
 
 
+def add_states_bulk(states_data: list) -> int:
+    """
+    Add many states with a single insert_many round-trip.
+    Raises ValueError (and inserts nothing) if any state is invalid.
+    States whose code already exists, or repeats earlier in the batch, are
+    skipped.
+    Returns the number of states inserted.
+    """
+    if not states_data:
+        return 0
+
+    for state_data in states_data:
+        _sanitize_new_state(state_data)
+
+    # One $in read rather than relying on the unique state_code index alone
+    seen = set(get_states_by_codes([state[STATE_CODE] for state in states_data]))
+    new_states = []
+    for state_data in states_data:
+        if state_data[STATE_CODE] not in seen:
+            seen.add(state_data[STATE_CODE])
+            new_states.append(state_data)
+    if not new_states:
+        return 0
+
+    now = datetime.now(UTC)
+    for state_data in new_states:
+        state_data['created_at'] = now
+        state_data['updated_at'] = now
+
+    inserted = dbc.create_many(STATES_COLLECT, new_states, ordered=False)
+    if inserted:
+        state_list_cache.clear()
+    return inserted
+
+
 def update_state(code: str, update_data: dict) -> bool:
     """
     Update a state by its code
     Returns True if successful, False otherwise
     """
-    if not get_state_by_code(code):
-        return False
-
     # Sanitize string fields in update
     if STATE_NAME in update_data:
         update_data[STATE_NAME] = sanitize_string(update_data[STATE_NAME])
@@ -188,12 +310,18 @@ def update_state(code: str, update_data: dict) -> bool:
         del update_data[STATE_CODE]
     # Set updated_at timestamp - strip user value first
     update_data.pop('created_at', None)
-    from datetime import datetime as _dt, UTC
-    update_data[UPDATED_AT] = _dt.now(UTC)
+    update_data[UPDATED_AT] = datetime.now(UTC)
 
     result = dbc.update(STATES_COLLECT, {STATE_CODE: code}, update_data)
+    if result.matched_count == 0:
+        return False
     if result.modified_count > 0:
-        state_by_code_cache.invalidate(code.upper())
+        # Write-through so the read that usually follows an update hits the cache
+        key = code.upper()
+        cached = state_by_code_cache.get(key)
+        if cached is not None:
+            state_by_code_cache.set(key, {**cached, **update_data})
+        state_list_cache.clear()
         return True
     return False
 
@@ -202,9 +330,7 @@ def get_dependent_cities_count(state_code: str) -> int:
     """
     Check how many cities belong to this state.
     """
-    import data.cities as cities
-    cities_list = cities.get_cities_by_state(state_code)
-    return len(cities_list)
+    return cities.count_cities_by_state(state_code)
 
 
 def get_state_delete_impact(state_code: str) -> dict | None:
@@ -232,12 +358,10 @@ def can_delete_state(state_code: str) -> tuple[bool, str]:
     Check if state can be safely deleted.
     Returns (can_delete: bool, reason: str)
     """
-    delete_impact = get_state_delete_impact(state_code)
-    if delete_impact is None:
-        return True, ""
-
-    dependent_count = delete_impact["cities"]
-    if delete_impact["blocked"]:
+    # Only dependent cities block a delete, so count just those in one
+    # round-trip rather than building the full delete impact
+    dependent_count = get_dependent_cities_count(state_code.upper())
+    if dependent_count > 0:
         return False, f"Cannot delete: {dependent_count} city/cities depend on this state"
     return True, ""
 
@@ -253,6 +377,7 @@ def delete_state(code: str) -> bool:
     result = dbc.delete(STATES_COLLECT, {STATE_CODE: code})
     if result > 0:
         state_by_code_cache.invalidate(code.upper())
+        state_list_cache.clear()
         return True
     return False
 
@@ -266,6 +391,7 @@ def delete_state_cascade(code: str) -> bool:
     result = dbc.delete(STATES_COLLECT, {STATE_CODE: code.upper()})
     if result > 0:
         state_by_code_cache.invalidate(code.upper())
+        state_list_cache.clear()
         return True
     return False
 
@@ -278,8 +404,14 @@ def delete_states_by_country(country_code: str) -> int:
 
     cities.delete_cities_by_country(country_code)
 
-    return dbc.delete_many(STATES_COLLECT,
-                           {COUNTRY_CODE: country_code.upper()})
+    deleted = dbc.delete_many(STATES_COLLECT,
+                              {COUNTRY_CODE: country_code.upper()})
+    if deleted:
+        # The deleted codes aren't known here, so drop every cached state
+        # rather than let state_exists keep confirming them
+        state_by_code_cache.clear()
+        state_list_cache.clear()
+    return deleted
 
 
 def state_exists(code: str) -> bool:
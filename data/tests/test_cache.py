@@ -0,0 +1,83 @@
+"""
+Tests for the in-memory LRU cache helper.
+"""
+from unittest.mock import patch
+
+from data.cache import (
+    LIST_CACHE_TTL_SECONDS,
+    LRUCache,
+    city_search_cache,
+    country_list_cache,
+    state_list_cache,
+)
+
+
+def test_set_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_get_marks_entry_as_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_set_existing_key_does_not_evict():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    assert cache.get("a") == 10
+    assert cache.get("b") == 2
+
+
+def test_full_cache_evicts_a_batch():
+    cache = LRUCache(maxsize=4, evict_batch=2)
+    for key in "abcd":
+        cache.set(key, key)
+    cache.set("e", "e")
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c") == "c"
+    assert cache.get("e") == "e"
+
+
+def test_entry_expires_after_ttl():
+    cache = LRUCache(maxsize=2, ttl=10)
+    with patch("data.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("data.cache.time.monotonic", return_value=109.0):
+        assert cache.get("a") == 1
+    with patch("data.cache.time.monotonic", return_value=110.0):
+        assert cache.get("a") is None
+    assert cache.get("a") is None
+
+
+def test_no_ttl_keeps_entries():
+    cache = LRUCache(maxsize=2)
+    with patch("data.cache.time.monotonic", return_value=0.0):
+        cache.set("a", 1)
+    with patch("data.cache.time.monotonic", return_value=1e9):
+        assert cache.get("a") == 1
+
+
+def test_country_list_cache_has_ttl():
+    assert country_list_cache.ttl == LIST_CACHE_TTL_SECONDS
+
+
+def test_state_list_cache_has_ttl():
+    assert state_list_cache.ttl == LIST_CACHE_TTL_SECONDS
+
+
+def test_city_search_cache_has_ttl():
+    assert city_search_cache.ttl == LIST_CACHE_TTL_SECONDS
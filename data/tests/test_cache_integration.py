@@ -11,16 +11,29 @@ import data.states as states
 import data.cities as cities
 from data.cache import (
     country_by_code_cache,
+    country_code_exists_cache,
     state_by_code_cache,
     city_by_name_state_cache,
+    city_search_cache,
+    country_list_cache,
+    state_list_cache,
 )
 
 
 def setup_function(function):
     # Clear caches before each test to avoid cross-test interference
     country_by_code_cache.clear()
+    country_code_exists_cache.clear()
     state_by_code_cache.clear()
     city_by_name_state_cache.clear()
+    city_search_cache.clear()
+    country_list_cache.clear()
+    state_list_cache.clear()
+
+
+def teardown_function(function):
+    # Don't leak primed entries into other test modules
+    setup_function(function)
 
 
 def test_get_country_by_code_uses_cache():
@@ -95,17 +108,225 @@ def test_get_city_by_name_and_state_uses_cache():
         assert mock_read_one.call_count == 1
 
 
-def test_update_city_invalidates_cache():
+def test_update_city_writes_through_cache():
     sample = cities.TEST_CITY.copy()
     name = sample[cities.CITY_NAME]
     state_code = sample[cities.STATE_CODE]
 
     city_by_name_state_cache.set((name, state_code), sample)
 
-    with patch("data.cities.get_city_by_name_and_state", return_value=True), \
+    with patch("data.cities.city_exists", return_value=True), \
          patch("data.db_connect.update") as mock_update:
         mock_update.return_value = MagicMock(modified_count=1)
         ok = cities.update_city(name, state_code, {"population": 999})
 
     assert ok is True
-    assert city_by_name_state_cache.get((name, state_code)) is None
+    cached = city_by_name_state_cache.get((name, state_code))
+    assert cached[cities.POPULATION] == 999
+    assert cached[cities.COUNTRY_CODE] == sample[cities.COUNTRY_CODE]
+    # The caller's previously returned dict is not mutated
+    assert sample[cities.POPULATION] == cities.TEST_CITY[cities.POPULATION]
+
+
+def test_update_city_does_not_cache_unread_city():
+    with patch("data.cities.city_exists", return_value=True), \
+         patch("data.db_connect.update") as mock_update:
+        mock_update.return_value = MagicMock(modified_count=1)
+        cities.update_city("Springfield", "IL", {"population": 999})
+
+    assert city_by_name_state_cache.get(("Springfield", "IL")) is None
+
+
+def test_country_exists_uses_cache():
+    """A country already in the cache is confirmed without a DB read."""
+    code = countries.TEST_COUNTRY[countries.COUNTRY_CODE]
+    country_by_code_cache.set(code, countries.TEST_COUNTRY.copy())
+
+    with patch("data.db_connect.read_one") as mock_read_one:
+        assert countries.country_exists(code.lower()) is True
+        mock_read_one.assert_not_called()
+
+
+def test_country_exists_records_positive_lookups():
+    """Repeated checks for an existing country read the DB once."""
+    with patch("data.db_connect.read_one") as mock_read_one:
+        mock_read_one.return_value = {countries.COUNTRY_CODE: "US"}
+        for _ in range(5):
+            assert countries.country_exists("us") is True
+        assert mock_read_one.call_count == 1
+
+
+def test_country_exists_does_not_record_misses():
+    """A missing country is re-checked, since it may be added later."""
+    with patch("data.db_connect.read_one", return_value=None) as mock_read_one:
+        assert countries.country_exists("XX") is False
+        assert countries.country_exists("XX") is False
+        assert mock_read_one.call_count == 2
+
+
+def test_country_exists_forgets_deleted_country():
+    """Invalidating a country drops its recorded existence."""
+    with patch("data.db_connect.read_one") as mock_read_one:
+        mock_read_one.return_value = {countries.COUNTRY_CODE: "US"}
+        assert countries.country_exists("US") is True
+        countries.invalidate_country_cache("us")
+        mock_read_one.return_value = None
+        assert countries.country_exists("US") is False
+
+
+def test_get_countries_uses_cache_until_write():
+    """Listing countries hits the DB once until a country is written."""
+    sample = countries.TEST_COUNTRY.copy()
+
+    with patch("data.db_connect.read", return_value=[sample]) as mock_read:
+        assert countries.get_countries() == [sample]
+        assert countries.get_countries() == [sample]
+        assert mock_read.call_count == 1
+
+        with patch("data.db_connect.update") as mock_update:
+            mock_update.return_value = MagicMock(matched_count=1, modified_count=1)
+            countries.update_country(sample[countries.COUNTRY_CODE], {"population": 1})
+
+        countries.get_countries()
+        assert mock_read.call_count == 2
+
+
+def test_get_country_dict_caches_only_full_reads():
+    sample = countries.TEST_COUNTRY.copy()
+    code = sample[countries.COUNTRY_CODE]
+
+    with patch("data.db_connect.read_dict", return_value={code: sample}) as mock_read_dict:
+        countries.get_country_dict()
+        countries.get_country_dict()
+        countries.get_country_dict(projection={countries.COUNTRY_NAME: 1})
+        assert mock_read_dict.call_count == 2
+
+
+def test_delete_country_invalidates_cache():
+    code = countries.TEST_COUNTRY[countries.COUNTRY_CODE]
+    country_by_code_cache.set(code, countries.TEST_COUNTRY.copy())
+
+    with patch("data.countries.can_delete_country", return_value=(True, "")), \
+         patch("data.db_connect.delete", return_value=1):
+        ok = countries.delete_country(code.lower())
+
+    assert ok is True
+    assert country_by_code_cache.get(code) is None
+
+
+def test_city_cache_key_ignores_whitespace_and_code_case():
+    """Differently spelled lookups of the same city share one cache entry."""
+    sample = cities.TEST_CITY.copy()
+
+    with patch("data.db_connect.read_one", return_value=sample) as mock_read_one:
+        cities.get_city_by_name_and_state("Springfield", "IL")
+        cities.get_city_by_name_and_state("  Springfield ", " il")
+        assert mock_read_one.call_count == 1
+
+
+def test_get_cities_by_name_uses_cache_until_write():
+    """Repeated searches hit the cache; a city write drops cached results."""
+    sample = cities.TEST_CITY.copy()
+
+    with patch("data.db_connect.read_filtered", return_value=[sample]) as mock_read:
+        assert cities.get_cities_by_name("Springfield") == [sample]
+        assert cities.get_cities_by_name(" springfield ") == [sample]
+        assert mock_read.call_count == 1
+
+        with patch("data.db_connect.delete", return_value=1):
+            cities.delete_city(sample[cities.CITY_NAME], sample[cities.STATE_CODE])
+
+        cities.get_cities_by_name("Springfield")
+        assert mock_read.call_count == 2
+
+
+def test_get_states_uses_cache_until_write():
+    """Listing states hits the DB once until a state is written."""
+    sample = states.TEST_STATE.copy()
+
+    with patch("data.db_connect.read", return_value=[sample]) as mock_read:
+        assert states.get_states() == [sample]
+        assert states.get_states() == [sample]
+        assert mock_read.call_count == 1
+
+        with patch("data.db_connect.update") as mock_update:
+            mock_update.return_value = MagicMock(matched_count=1, modified_count=1)
+            states.update_state(sample[states.STATE_CODE], {"population": 1})
+
+        states.get_states()
+        assert mock_read.call_count == 2
+
+
+def test_update_state_writes_through_cache():
+    sample = states.TEST_STATE.copy()
+    code = sample[states.STATE_CODE]
+    state_by_code_cache.set(code, sample)
+
+    with patch("data.db_connect.update") as mock_update, \
+         patch("data.db_connect.read_one") as mock_read_one:
+        mock_update.return_value = MagicMock(matched_count=1, modified_count=1)
+        assert states.update_state(code, {states.POPULATION: 999}) is True
+        cached = states.get_state_by_code(code)
+
+    mock_read_one.assert_not_called()
+    assert cached[states.POPULATION] == 999
+    assert cached[states.STATE_NAME] == sample[states.STATE_NAME]
+    # The caller's previously returned dict is not mutated
+    assert sample[states.POPULATION] == states.TEST_STATE[states.POPULATION]
+
+
+def test_get_state_dict_cleared_by_delete_states_by_country():
+    sample = states.TEST_STATE.copy()
+    code = sample[states.STATE_CODE]
+
+    with patch("data.db_connect.read_dict", return_value={code: sample}) as mock_read_dict:
+        states.get_state_dict()
+        states.get_state_dict()
+        assert mock_read_dict.call_count == 1
+
+        with patch("data.cities.delete_cities_by_country"), \
+             patch("data.db_connect.delete_many", return_value=1):
+            states.delete_states_by_country(sample[states.COUNTRY_CODE])
+
+        states.get_state_dict()
+        assert mock_read_dict.call_count == 2
+
+
+def test_delete_states_by_country_evicts_cached_states():
+    """Cascade-deleted states are no longer confirmed from the cache."""
+    sample = states.TEST_STATE.copy()
+    code = sample[states.STATE_CODE]
+    state_by_code_cache.set(code, sample)
+
+    with patch("data.cities.delete_cities_by_country"), \
+         patch("data.db_connect.delete_many", return_value=1):
+        states.delete_states_by_country(sample[states.COUNTRY_CODE])
+
+    with patch("data.db_connect.read_one", return_value=None):
+        assert states.state_exists(code) is False
+
+
+def test_get_states_by_codes_batches_cache_misses():
+    """Codes missing from the cache are fetched with one $in read."""
+    ny = states.TEST_STATE.copy()
+    ca = {**states.TEST_STATE, states.STATE_CODE: "CA"}
+    state_by_code_cache.set("NY", ny)
+
+    with patch("data.db_connect.read_iter", return_value=iter([ca])) as mock_iter:
+        found = states.get_states_by_codes(["ny", "ca", "ZZ"])
+
+    assert found == {"NY": ny, "CA": ca}
+    mock_iter.assert_called_once_with(
+        states.STATES_COLLECT, {states.STATE_CODE: {"$in": ["CA", "ZZ"]}}
+    )
+    assert state_by_code_cache.get("CA") == ca
+
+
+def test_get_states_by_codes_all_cached_skips_db():
+    state_by_code_cache.set("NY", states.TEST_STATE.copy())
+
+    with patch("data.db_connect.read_iter") as mock_iter:
+        found = states.get_states_by_codes(["NY"])
+
+    assert list(found) == ["NY"]
+    mock_iter.assert_not_called()
@@ -2,10 +2,34 @@
 Tests for the cities data module.
 """
 import pytest
-from unittest.mock import patch, MagicMock, DEFAULT
+from types import SimpleNamespace
+from unittest.mock import patch, DEFAULT
 from datetime import datetime
 from data import cities
 
+# Lookup filters asserted by several tests; never passed to code under test
+SPRINGFIELD_IL_QUERY = {cities.CITY_NAME: 'Springfield', cities.STATE_CODE: 'IL'}
+MONACO_MC_QUERY = {cities.CITY_NAME: 'Monaco', cities.COUNTRY_CODE: 'MC'}
+
+
+# Write results are only read, never mutated, so one instance serves the module
+@pytest.fixture(scope='module')
+def mock_acknowledged_result():
+    """Stand-in result for successful database create operations."""
+    return SimpleNamespace(acknowledged=True)
+
+
+@pytest.fixture(scope='module')
+def mock_modified_result():
+    """Stand-in result for successful database update operations."""
+    return SimpleNamespace(modified_count=1)
+
+
+@pytest.fixture(scope='module')
+def mock_not_modified_result():
+    """Stand-in result for database update with no changes."""
+    return SimpleNamespace(modified_count=0)
+
 
 class TestCities:
     """Test class for cities module."""
@@ -31,27 +55,6 @@ class TestCities:
             cities.POPULATION: 38000
         }
 
-    @pytest.fixture
-    def mock_acknowledged_result(self):
-        """Mock result for successful database create operations."""
-        result = MagicMock()
-        result.acknowledged = True
-        return result
-
-    @pytest.fixture
-    def mock_modified_result(self):
-        """Mock result for successful database update operations."""
-        result = MagicMock()
-        result.modified_count = 1
-        return result
-
-    @pytest.fixture
-    def mock_not_modified_result(self):
-        """Mock result for database update with no changes."""
-        result = MagicMock()
-        result.modified_count = 0
-        return result
-
     # ===== Read operations tests =====
 
     def test_get_cities(self):
@@ -62,118 +65,92 @@ class TestCities:
             mock_read.assert_called_once_with(cities.CITIES_COLLECT)
             assert result == [cities.TEST_CITY]
 
-    def test_get_cities_by_country(self):
-        """Test getting cities by country."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [cities.TEST_CITY]
-            result = cities.get_cities_by_country('US')
-            mock_collection.find.assert_called_once_with(
-                {cities.COUNTRY_CODE: 'US'})
-            assert result == [cities.TEST_CITY]
-
-    def test_get_cities_by_state(self):
-        """Test getting cities by state."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [cities.TEST_CITY]
-            result = cities.get_cities_by_state('IL')
-            mock_collection.find.assert_called_once_with(
-                {cities.STATE_CODE: 'IL'})
-            assert result == [cities.TEST_CITY]
-
-    def test_get_cities_by_country_empty(self):
-        """Test getting cities by country returns empty list when none found."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = []
-            result = cities.get_cities_by_country('XX')
-            mock_collection.find.assert_called_once_with(
-                {cities.COUNTRY_CODE: 'XX'})
-            assert result == []
-
-    def test_get_cities_by_state_empty(self):
-        """Test getting cities by state returns empty list when none found."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = []
-            result = cities.get_cities_by_state('XX')
-            mock_collection.find.assert_called_once_with(
-                {cities.STATE_CODE: 'XX'})
-            assert result == []
-
-    def test_get_cities_by_population_range_min_only(self):
-        """Test filtering by min population only builds $gte query."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [cities.TEST_CITY]
-            result = cities.get_cities_by_population_range(min_pop=100000)
-            mock_collection.find.assert_called_once_with(
-                {cities.POPULATION: {'$gte': 100000}})
-            assert result == [cities.TEST_CITY]
-
-    def test_get_cities_by_population_range_max_only(self):
-        """Test filtering by max population only builds $lte query."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [cities.TEST_CITY]
-            result = cities.get_cities_by_population_range(max_pop=200000)
-            mock_collection.find.assert_called_once_with(
-                {cities.POPULATION: {'$lte': 200000}})
-            assert result == [cities.TEST_CITY]
-
-    def test_get_cities_by_population_range(self):
-        """Test getting cities by population range."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [cities.TEST_CITY]
-            result = cities.get_cities_by_population_range(
-                min_pop=50000, max_pop=500000)
-            mock_collection.find.assert_called_once_with({
-                cities.POPULATION: {'$gte': 50000, '$lte': 500000}
-            })
-            assert result == [cities.TEST_CITY]
-
-    def test_get_cities_by_population_range_no_filters(self):
-        """Test getting cities by population range with no filters."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [cities.TEST_CITY]
-            result = cities.get_cities_by_population_range()
-            mock_collection.find.assert_called_once_with({})
-            assert result == [cities.TEST_CITY]
-
-    def test_get_city_by_name(self):
-        """Test getting a city by its name."""
+    @pytest.mark.parametrize('method,kwargs,query,found', [
+        ('get_cities_by_country', {'country_code': 'US'}, {cities.COUNTRY_CODE: 'US'}, [cities.TEST_CITY]),
+        ('get_cities_by_state', {'state_code': 'IL'}, {cities.STATE_CODE: 'IL'}, [cities.TEST_CITY]),
+        ('get_cities_by_country', {'country_code': 'XX'}, {cities.COUNTRY_CODE: 'XX'}, []),
+        ('get_cities_by_state', {'state_code': 'XX'}, {cities.STATE_CODE: 'XX'}, []),
+        ('get_cities_by_population_range', {'min_pop': 100000},
+         {cities.POPULATION: {'$gte': 100000}}, [cities.TEST_CITY]),
+        ('get_cities_by_population_range', {'max_pop': 200000},
+         {cities.POPULATION: {'$lte': 200000}}, [cities.TEST_CITY]),
+        ('get_cities_by_population_range', {'min_pop': 50000, 'max_pop': 500000},
+         {cities.POPULATION: {'$gte': 50000, '$lte': 500000}}, [cities.TEST_CITY]),
+        ('get_cities_by_population_range', {}, {}, [cities.TEST_CITY]),
+    ], ids=['country', 'state', 'country-none', 'state-none', 'min', 'max', 'both', 'none'])
+    def test_get_cities_by_filter(self, mock_collection, method, kwargs, query, found):
+        """Test the get_cities_by_* helpers send the expected filter."""
+        mock_collection.find.return_value = found
+        result = getattr(cities, method)(**kwargs)
+        mock_collection.find.assert_called_once_with(query, {'_id': 0}, batch_size=1000)
+        assert result == found
+
+    @pytest.mark.parametrize('method,args,query', [
+        ('get_city_by_name', ('Springfield',), {cities.CITY_NAME: 'Springfield'}),
+        ('get_city_by_name_and_country', ('Springfield', 'US'),
+         {cities.CITY_NAME: 'Springfield', cities.COUNTRY_CODE: 'US'}),
+        ('get_city_by_name_and_state', ('Springfield', 'IL'),
+         SPRINGFIELD_IL_QUERY),
+    ], ids=['name', 'name-country', 'name-state'])
+    def test_get_city_by_lookup(self, method, args, query):
+        """Test single-city lookups read one document with the expected filter."""
         with patch('data.db_connect.read_one') as mock_read_one:
             mock_read_one.return_value = cities.TEST_CITY
-            result = cities.get_city_by_name('Springfield')
-            mock_read_one.assert_called_once_with(
-                cities.CITIES_COLLECT, {
-                    cities.CITY_NAME: 'Springfield'})
+            result = getattr(cities, method)(*args)
+            mock_read_one.assert_called_once_with(cities.CITIES_COLLECT, query)
             assert result == cities.TEST_CITY
 
-    def test_get_city_by_name_and_country(self):
-        """Test getting a city by its name and country code."""
-        with patch('data.db_connect.read_one') as mock_read_one:
-            mock_read_one.return_value = cities.TEST_CITY
-            result = cities.get_city_by_name_and_country('Springfield', 'US')
-            mock_read_one.assert_called_once_with(
+    def test_get_cities_by_name_partial_match(self):
+        """Test name search is an escaped, case-insensitive substring match."""
+        with patch('data.db_connect.read_filtered') as mock_read:
+            mock_read.return_value = [cities.TEST_CITY]
+            result = cities.get_cities_by_name('  st.  spring ')
+            mock_read.assert_called_once_with(
                 cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Springfield', cities.COUNTRY_CODE: 'US'}
-            )
-            assert result == cities.TEST_CITY
+                {cities.CITY_NAME: {'$regex': r'st\.\ spring', '$options': 'i'}})
+            assert result == [cities.TEST_CITY]
 
-    def test_get_city_by_name_and_state(self):
-        """Test getting a city by its name and state code."""
-        with patch('data.db_connect.read_one') as mock_read_one:
-            mock_read_one.return_value = cities.TEST_CITY
-            result = cities.get_city_by_name_and_state('Springfield', 'IL')
-            mock_read_one.assert_called_once_with(
+    def test_get_cities_by_name_blank(self):
+        """Test a blank name query does not hit the database."""
+        with patch('data.db_connect.read_filtered') as mock_read:
+            assert cities.get_cities_by_name('  ') == []
+            mock_read.assert_not_called()
+
+    def test_get_cities_filtered_escapes_name(self):
+        """Test regex metacharacters in the name are matched literally."""
+        with patch('data.db_connect.read_filtered') as mock_read:
+            mock_read.return_value = []
+            cities.get_cities_filtered(name='St. (Louis')
+            mock_read.assert_called_once_with(
                 cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Springfield', cities.STATE_CODE: 'IL'}
-            )
-            assert result == cities.TEST_CITY
+                {cities.CITY_NAME: {'$regex': r'St\.\ \(Louis', '$options': 'i'}})
+
+    @pytest.mark.parametrize('kwargs,expected', [
+        ({}, {}),
+        ({'name': ' York '}, {cities.CITY_NAME: {'$regex': 'York', '$options': 'i'}}),
+        ({'state_code': ' ny'}, {cities.STATE_CODE: 'NY'}),
+        ({'country_code': 'us '}, {cities.COUNTRY_CODE: 'US'}),
+        ({'name': '  ', 'country_code': 'us'}, {cities.COUNTRY_CODE: 'US'}),
+        ({'state_code': 'NY', 'country_code': 'US'},
+         {cities.STATE_CODE: 'NY', cities.COUNTRY_CODE: 'US'}),
+        ({'country_code': 'US', 'min_pop': 10},
+         {cities.COUNTRY_CODE: 'US', cities.POPULATION: {'$gte': 10}}),
+    ], ids=['none', 'name', 'state', 'country', 'blank-name', 'state-country', 'country-min'])
+    def test_get_cities_filtered_query_shapes(self, kwargs, expected):
+        """Test the filter builder produces the expected query for each shape."""
+        with patch('data.db_connect.read_filtered') as mock_read:
+            mock_read.return_value = []
+            cities.get_cities_filtered(**kwargs)
+            mock_read.assert_called_once_with(cities.CITIES_COLLECT, expected)
+
+    def test_iter_cities_filtered_streams_cursor(self, mock_collection):
+        """Test the streaming read yields docs off a batched cursor."""
+        doc = {cities.CITY_NAME: 'Springfield'}
+        mock_collection.find.return_value.batch_size.return_value = [doc]
+
+        result = cities.iter_cities_filtered(state_code=' il ')
+        assert list(result) == [{cities.CITY_NAME: 'Springfield'}]
+        mock_collection.find.assert_called_once_with({cities.STATE_CODE: 'IL'}, {'_id': 0})
 
     # ===== Create operations tests =====
 
@@ -182,11 +159,11 @@ class TestCities:
             sample_city_with_state,
             mock_acknowledged_result):
         """Test successfully adding a new city with state."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get, \
+        with patch('data.db_connect.exists') as mock_get, \
                 patch('data.db_connect.create') as mock_create, \
                 patch('data.states.state_exists', return_value=True), \
                 patch('data.countries.country_exists', return_value=True):
-            mock_get.return_value = None
+            mock_get.return_value = False
             mock_create.return_value = mock_acknowledged_result
 
             result = cities.add_city(sample_city_with_state)
@@ -197,10 +174,10 @@ class TestCities:
     def test_add_city_success_without_state(
             self, sample_city_no_state, mock_acknowledged_result):
         """Test successfully adding a new city without state."""
-        with patch('data.cities.get_city_by_name_and_country') as mock_get, \
+        with patch('data.db_connect.exists') as mock_get, \
                 patch('data.db_connect.create') as mock_create, \
                 patch('data.countries.country_exists', return_value=True):
-            mock_get.return_value = None
+            mock_get.return_value = False
             mock_create.return_value = mock_acknowledged_result
 
             result = cities.add_city(sample_city_no_state)
@@ -240,57 +217,133 @@ class TestCities:
 
     def test_add_city_already_exists_in_state(self, sample_city_with_state):
         """Test adding a city that already exists in the same state."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get, \
+        with patch('data.db_connect.exists') as mock_get, \
                 patch('data.states.state_exists', return_value=True), \
                 patch('data.countries.country_exists', return_value=True):
-            mock_get.return_value = sample_city_with_state
+            mock_get.return_value = True
             with pytest.raises(ValueError, match="already exists in state"):
                 cities.add_city(sample_city_with_state)
 
     def test_add_city_already_exists_in_country(self, sample_city_no_state):
         """Test adding a city that already exists in the same country (no state)."""
-        with patch('data.cities.get_city_by_name_and_country') as mock_get, \
+        with patch('data.db_connect.exists') as mock_get, \
                 patch('data.countries.country_exists', return_value=True):
-            mock_get.return_value = sample_city_no_state
+            mock_get.return_value = True
             with pytest.raises(ValueError, match="already exists in country"):
                 cities.add_city(sample_city_no_state)
 
+    def test_add_cities_bulk_success(self, sample_city_with_state, sample_city_no_state):
+        """Test bulk add validates codes with one query each and inserts once."""
+        def fake_distinct(collection, key, filt):
+            return {'countries': ['US', 'MC'], 'states': ['IL']}[collection]
+
+        with patch('data.db_connect.distinct', side_effect=fake_distinct) as mock_distinct, \
+                patch('data.db_connect.read_filtered', return_value=[]) as mock_read, \
+                patch('data.db_connect.create_many', return_value=2) as mock_create_many:
+            result = cities.add_cities_bulk(
+                [sample_city_with_state, sample_city_no_state])
+
+            assert result == 2
+            assert mock_distinct.call_count == 2
+            mock_read.assert_called_once_with(
+                cities.CITIES_COLLECT,
+                {'$or': [SPRINGFIELD_IL_QUERY, MONACO_MC_QUERY]},
+                projection={cities.CITY_NAME: 1, cities.STATE_CODE: 1, cities.COUNTRY_CODE: 1})
+            mock_create_many.assert_called_once_with(
+                cities.CITIES_COLLECT,
+                [sample_city_with_state, sample_city_no_state],
+                ordered=False)
+            assert cities.CREATED_AT in sample_city_no_state
+
+    def test_add_cities_bulk_skips_duplicates(self, sample_city_with_state, sample_city_no_state):
+        """Test bulk add skips the cities add_city would reject as duplicates."""
+        def fake_distinct(collection, key, filt):
+            return {'countries': ['US', 'MC'], 'states': ['IL']}[collection]
+
+        # A stored Monaco with a state still blocks a stateless Monaco
+        stored = [{cities.CITY_NAME: 'Monaco', cities.STATE_CODE: 'MO', cities.COUNTRY_CODE: 'MC'}]
+        repeat = dict(sample_city_with_state)
+        with patch('data.db_connect.distinct', side_effect=fake_distinct), \
+                patch('data.db_connect.read_filtered', return_value=stored), \
+                patch('data.db_connect.create_many', return_value=1) as mock_create_many:
+            result = cities.add_cities_bulk(
+                [sample_city_with_state, sample_city_no_state, repeat])
+
+            assert result == 1
+            mock_create_many.assert_called_once_with(
+                cities.CITIES_COLLECT, [sample_city_with_state], ordered=False)
+
+    def test_add_cities_bulk_all_duplicates(self, sample_city_with_state):
+        """Test bulk add makes no insert when every city already exists."""
+        with patch('data.db_connect.distinct', side_effect=[['US'], ['IL']]), \
+                patch('data.db_connect.read_filtered', return_value=[dict(sample_city_with_state)]), \
+                patch('data.db_connect.create_many') as mock_create_many:
+            assert cities.add_cities_bulk([sample_city_with_state]) == 0
+            mock_create_many.assert_not_called()
+
+    def test_add_cities_bulk_negative_area(self, sample_city_with_state):
+        """Test bulk add shares add_city's population and area checks."""
+        with patch('data.db_connect.create_many') as mock_create_many:
+            with pytest.raises(ValueError, match="Area cannot be negative"):
+                cities.add_cities_bulk([{**sample_city_with_state, cities.AREA_KM2: -1}])
+            mock_create_many.assert_not_called()
+
+    def test_add_cities_bulk_unknown_state(self, sample_city_with_state):
+        """Test bulk add rejects the batch when a state code does not exist."""
+        def fake_distinct(collection, key, filt):
+            return {'countries': ['US'], 'states': []}[collection]
+
+        with patch('data.db_connect.distinct', side_effect=fake_distinct), \
+                patch('data.db_connect.create_many') as mock_create_many:
+            with pytest.raises(ValueError, match="State with code 'IL' does not exist"):
+                cities.add_cities_bulk([sample_city_with_state])
+            mock_create_many.assert_not_called()
+
+    def test_add_cities_bulk_unknown_country(self, sample_city_no_state):
+        """Test bulk add rejects the batch when a country code does not exist."""
+        with patch('data.db_connect.distinct', return_value=[]), \
+                patch('data.db_connect.create_many') as mock_create_many:
+            with pytest.raises(ValueError, match="Country with code 'MC' does not exist"):
+                cities.add_cities_bulk([sample_city_no_state])
+            mock_create_many.assert_not_called()
+
+    def test_add_cities_bulk_empty(self):
+        """Test bulk add with no cities does not touch the database."""
+        with patch('data.db_connect.distinct') as mock_distinct:
+            assert cities.add_cities_bulk([]) == 0
+            mock_distinct.assert_not_called()
+
     # ===== Update operations tests =====
 
-    def test_update_city_success(
-            self,
-            sample_city_with_state,
-            mock_modified_result):
-        """Test successfully updating a city."""
+    @pytest.mark.parametrize('method,name,code,query', [
+        ('update_city', 'Springfield', 'IL', SPRINGFIELD_IL_QUERY),
+        ('update_city_by_name_and_country', 'Monaco', 'MC', MONACO_MC_QUERY),
+    ], ids=['state', 'country'])
+    @pytest.mark.parametrize('exists', [True, False], ids=['found', 'missing'])
+    def test_update_city_variants(
+            self, mock_modified_result, method, name, code, query, exists):
+        """Test updates write only when the city exists."""
         update_data = {cities.POPULATION: 120000}
 
-        with patch('data.cities.get_city_by_name_and_state') as mock_get, \
+        with patch('data.cities.city_exists') as mock_get, \
                 patch('data.db_connect.update') as mock_update:
-            mock_get.return_value = sample_city_with_state
+            mock_get.return_value = exists
             mock_update.return_value = mock_modified_result
 
-            result = cities.update_city('Springfield', 'IL', update_data)
-            assert result is True
-            mock_update.assert_called_once_with(
-                cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Springfield', cities.STATE_CODE: 'IL'},
-                update_data
-            )
-
-    def test_update_city_not_found(self):
-        """Test updating a city that doesn't exist."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get:
-            mock_get.return_value = None  # City doesn't exist
-
-            result = cities.update_city('Nowhere', 'XX', {})
-            assert result is False
+            result = getattr(cities, method)(name, code, update_data)
+            assert result is exists
+            if exists:
+                mock_update.assert_called_once_with(
+                    cities.CITIES_COLLECT, query, update_data)
+            else:
+                mock_update.assert_not_called()
 
     def test_update_city_strips_name_from_update(
             self, sample_city_with_state, mock_modified_result):
         """Test update removes CITY_NAME before calling update."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get, \
+        with patch('data.cities.city_exists') as mock_get, \
                 patch('data.db_connect.update') as mock_update:
-            mock_get.return_value = sample_city_with_state
+            mock_get.return_value = True
             mock_update.return_value = mock_modified_result
             payload = {
                 cities.CITY_NAME: 'NewName',
@@ -301,16 +354,16 @@ class TestCities:
             assert result is True
             mock_update.assert_called_once_with(
                 cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Springfield', cities.STATE_CODE: 'IL'},
+                SPRINGFIELD_IL_QUERY,
                 {cities.POPULATION: 123, cities.UPDATED_AT: payload[cities.UPDATED_AT]}
             )
 
     def test_update_city_strips_state_code_from_update(
             self, sample_city_with_state, mock_modified_result):
         """Test update removes STATE_CODE before calling update."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get, \
+        with patch('data.cities.city_exists') as mock_get, \
                 patch('data.db_connect.update') as mock_update:
-            mock_get.return_value = sample_city_with_state
+            mock_get.return_value = True
             mock_update.return_value = mock_modified_result
             payload = {
                 cities.STATE_CODE: 'XX',
@@ -321,44 +374,16 @@ class TestCities:
             assert result is True
             mock_update.assert_called_once_with(
                 cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Springfield', cities.STATE_CODE: 'IL'},
+                SPRINGFIELD_IL_QUERY,
                 {cities.POPULATION: 123, cities.UPDATED_AT: payload[cities.UPDATED_AT]}
             )
 
-    def test_update_city_by_name_and_country_success(
-            self, sample_city_no_state, mock_modified_result):
-        """Test successfully updating a city by name and country."""
-        update_data = {cities.POPULATION: 40000}
-
-        with patch('data.cities.get_city_by_name_and_country') as mock_get, \
-                patch('data.db_connect.update') as mock_update:
-            mock_get.return_value = sample_city_no_state
-            mock_update.return_value = mock_modified_result
-
-            result = cities.update_city_by_name_and_country(
-                'Monaco', 'MC', update_data)
-            assert result is True
-            mock_update.assert_called_once_with(
-                cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Monaco', cities.COUNTRY_CODE: 'MC'},
-                update_data
-            )
-
-    def test_update_city_by_name_and_country_not_found(self):
-        """Test updating a city by name and country that doesn't exist."""
-        with patch('data.cities.get_city_by_name_and_country') as mock_get:
-            mock_get.return_value = None
-
-            result = cities.update_city_by_name_and_country(
-                'Nowhere', 'XX', {})
-            assert result is False
-
     def test_update_city_by_name_and_country_strips_name(
             self, sample_city_no_state, mock_modified_result):
         """Test update by country removes CITY_NAME before calling update."""
-        with patch('data.cities.get_city_by_name_and_country') as mock_get, \
+        with patch('data.cities.city_exists') as mock_get, \
                 patch('data.db_connect.update') as mock_update:
-            mock_get.return_value = sample_city_no_state
+            mock_get.return_value = True
             mock_update.return_value = mock_modified_result
             payload = {cities.CITY_NAME: 'NewName', cities.POPULATION: 123}
 
@@ -367,16 +392,16 @@ class TestCities:
             assert result is True
             mock_update.assert_called_once_with(
                 cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Monaco', cities.COUNTRY_CODE: 'MC'},
+                MONACO_MC_QUERY,
                 {cities.POPULATION: 123}
             )
 
     def test_update_city_by_name_and_country_strips_country_code(
             self, sample_city_no_state, mock_modified_result):
         """Test update by country removes COUNTRY_CODE before calling update."""
-        with patch('data.cities.get_city_by_name_and_country') as mock_get, \
+        with patch('data.cities.city_exists') as mock_get, \
                 patch('data.db_connect.update') as mock_update:
-            mock_get.return_value = sample_city_no_state
+            mock_get.return_value = True
             mock_update.return_value = mock_modified_result
             payload = {cities.COUNTRY_CODE: 'XX', cities.POPULATION: 123}
 
@@ -385,101 +410,57 @@ class TestCities:
             assert result is True
             mock_update.assert_called_once_with(
                 cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Monaco', cities.COUNTRY_CODE: 'MC'},
+                MONACO_MC_QUERY,
                 {cities.POPULATION: 123}
             )
 
     # ===== Delete operations tests =====
 
-    def test_delete_city_success(self):
-        """Test successfully deleting a city."""
-        with patch('data.db_connect.delete') as mock_delete:
-            mock_delete.return_value = 1
-
-            result = cities.delete_city('Springfield', 'IL')
-            assert result is True
-            mock_delete.assert_called_once_with(
-                cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Springfield', cities.STATE_CODE: 'IL'}
-            )
-
-    def test_delete_city_not_found(self):
-        """Test deleting a city that doesn't exist."""
+    @pytest.mark.parametrize('method,args,query,deleted', [
+        ('delete_city', ('Springfield', 'IL'),
+         SPRINGFIELD_IL_QUERY, 1),
+        ('delete_city', ('Nowhere', 'XX'),
+         {cities.CITY_NAME: 'Nowhere', cities.STATE_CODE: 'XX'}, 0),
+        ('delete_city_by_name_and_country', ('Monaco', 'MC'),
+         MONACO_MC_QUERY, 1),
+        ('delete_city_by_name_and_country', ('Nowhere', 'XX'),
+         {cities.CITY_NAME: 'Nowhere', cities.COUNTRY_CODE: 'XX'}, 0),
+    ], ids=['state', 'state-missing', 'country', 'country-missing'])
+    def test_delete_city_variants(self, method, args, query, deleted):
+        """Test deletes report whether a document was removed."""
         with patch('data.db_connect.delete') as mock_delete:
-            mock_delete.return_value = 0  # No documents deleted
+            mock_delete.return_value = deleted
 
-            result = cities.delete_city('Nowhere', 'XX')
-            assert result is False
-
-    def test_delete_city_by_name_and_country_success(self):
-        """Test successfully deleting a city by name and country."""
-        with patch('data.db_connect.delete') as mock_delete:
-            mock_delete.return_value = 1  # One document deleted
-
-            result = cities.delete_city_by_name_and_country('Monaco', 'MC')
-            assert result is True
-            mock_delete.assert_called_once_with(
-                cities.CITIES_COLLECT,
-                {cities.CITY_NAME: 'Monaco', cities.COUNTRY_CODE: 'MC'}
-            )
-
-    def test_delete_city_by_name_and_country_not_found(self):
-        """Test deleting a city by name and country that doesn't exist."""
-        with patch('data.db_connect.delete') as mock_delete:
-            mock_delete.return_value = 0
-
-            result = cities.delete_city_by_name_and_country('Nowhere', 'XX')
-            assert result is False
+            result = getattr(cities, method)(*args)
+            assert result is bool(deleted)
+            mock_delete.assert_called_once_with(cities.CITIES_COLLECT, query)
 
     # ===== Existence check tests =====
 
-    def test_city_exists_with_state(self):
-        """Test checking if a city exists by name and state."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get:
-            mock_get.return_value = cities.TEST_CITY
-
-            result = cities.city_exists('Springfield', state_code='IL')
-            assert result is True
-
-    def test_city_exists_with_state_false(self):
-        """Test checking if a city exists by name and state - returns False."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get:
-            mock_get.return_value = None
-
-            result = cities.city_exists('Nowhere', state_code='XX')
-            assert result is False
-
-    def test_city_exists_with_country(self):
-        """Test checking if a city exists by name and country."""
-        with patch('data.cities.get_city_by_name_and_country') as mock_get:
-            mock_get.return_value = cities.TEST_CITY
-
-            result = cities.city_exists('Monaco', country_code='MC')
-            assert result is True
-
-    def test_city_exists_with_country_false(self):
-        """Test checking if a city exists by name and country - returns False."""
-        with patch('data.cities.get_city_by_name_and_country') as mock_get:
-            mock_get.return_value = None
-
-            result = cities.city_exists('Nowhere', country_code='XX')
-            assert result is False
-
-    def test_city_exists_by_name_only(self):
-        """Test checking if a city exists by name only."""
-        with patch('data.cities.get_city_by_name') as mock_get:
-            mock_get.return_value = cities.TEST_CITY
-
-            result = cities.city_exists('Springfield')
-            assert result is True
-
-    def test_city_exists_by_name_only_false(self):
-        """Test checking if a city exists by name only - returns False."""
-        with patch('data.cities.get_city_by_name') as mock_get:
-            mock_get.return_value = None
-
-            result = cities.city_exists('Nowhere')
-            assert result is False
+    @pytest.mark.parametrize('name,kwargs,found', [
+        ('Springfield', {'state_code': 'IL'}, True),
+        ('Nowhere', {'state_code': 'XX'}, False),
+        ('Monaco', {'country_code': 'MC'}, True),
+        ('Nowhere', {'country_code': 'XX'}, False),
+        ('Springfield', {}, True),
+        ('Nowhere', {}, False),
+    ], ids=['state', 'state-missing', 'country', 'country-missing', 'name', 'name-missing'])
+    def test_city_exists(self, name, kwargs, found):
+        """Test city_exists by name and state, name and country, or name only."""
+        with patch('data.db_connect.exists') as mock_get:
+            mock_get.return_value = found
+
+            result = cities.city_exists(name, **kwargs)
+            assert result is found
+
+    def test_city_exists_projects_only_id(self, mock_collection):
+        """Test existence checks fetch only the _id, not the whole document."""
+        mock_collection.find_one.return_value = None
+
+        assert cities.city_exists('Nowhere', country_code='XX') is False
+        mock_collection.find_one.assert_called_once_with(
+            {cities.CITY_NAME: 'Nowhere', cities.COUNTRY_CODE: 'XX'},
+            {'_id': 1})
 
     # ===== Integration tests (skipped) =====
 
@@ -500,11 +481,11 @@ class TestCities:
 
     def test_add_city_sanitizes_whitespace(self, mock_acknowledged_result):
         """Test that add_city strips whitespace and normalizes codes."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get, \
+        with patch('data.db_connect.exists') as mock_get, \
                 patch('data.db_connect.create', return_value=mock_acknowledged_result), \
                 patch('data.states.state_exists', return_value=True), \
                 patch('data.countries.country_exists', return_value=True):
-            mock_get.return_value = None
+            mock_get.return_value = False
 
             city_data = {
                 cities.CITY_NAME: '  Springfield  ',
@@ -520,11 +501,11 @@ class TestCities:
 
     def test_add_city_collapses_spaces(self, mock_acknowledged_result):
         """Test that add_city collapses multiple spaces in name."""
-        with patch('data.cities.get_city_by_name_and_state') as mock_get, \
+        with patch('data.db_connect.exists') as mock_get, \
                 patch('data.db_connect.create', return_value=mock_acknowledged_result), \
                 patch('data.states.state_exists', return_value=True), \
                 patch('data.countries.country_exists', return_value=True):
-            mock_get.return_value = None
+            mock_get.return_value = False
 
             city_data = {
                 cities.CITY_NAME: 'New  York  City',
@@ -538,7 +519,7 @@ class TestCities:
     def test_update_city_sanitizes_country_code(
             self, sample_city_with_state, mock_modified_result):
         """Test that update_city sanitizes country code."""
-        with patch('data.cities.get_city_by_name_and_state', return_value=sample_city_with_state), \
+        with patch('data.cities.city_exists', return_value=True), \
                 patch('data.db_connect.update', return_value=mock_modified_result):
 
             update_data = {cities.COUNTRY_CODE: ' ca '}
@@ -571,7 +552,7 @@ class TestCities:
             }
         }
 
-        with patch('data.cities.get_city_by_name_and_state', return_value=sample_city_with_state), \
+        with patch('data.cities.city_exists', return_value=True), \
                 patch('data.db_connect.update') as mock_update:
             with pytest.raises(ValueError, match="longitude"):
                 cities.update_city('Springfield', 'IL', update_data)
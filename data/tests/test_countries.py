@@ -3,12 +3,20 @@ Tests for the countries data module.
 """
 import pytest
 from unittest.mock import patch, MagicMock
+from pymongo.errors import DuplicateKeyError
 from data import countries
+from data.cache import country_by_code_cache, country_code_exists_cache, country_list_cache
 
 
 class TestCountries:
     """Test class for countries module."""
 
+    def setup_method(self):
+        # Reads and add_country's existence check are cached across calls
+        country_list_cache.clear()
+        country_by_code_cache.clear()
+        country_code_exists_cache.clear()
+
     def test_get_countries(self):
         """Test getting all countries."""
         with patch('data.db_connect.read') as mock_read:
@@ -23,9 +31,20 @@ class TestCountries:
             expected = {'US': countries.TEST_COUNTRY}
             mock_read_dict.return_value = expected
             result = countries.get_country_dict()
-            mock_read_dict.assert_called_once_with(countries.COUNTRIES_COLLECT, countries.COUNTRY_CODE)
+            mock_read_dict.assert_called_once_with(
+                countries.COUNTRIES_COLLECT, countries.COUNTRY_CODE, projection=None)
             assert result == expected
 
+    def test_get_country_dict_with_projection(self, mock_collection):
+        """Test the country dict is built from a projected, batched cursor."""
+        mock_collection.find.return_value.batch_size.return_value = [
+            {countries.COUNTRY_CODE: 'US', countries.COUNTRY_NAME: 'United States'}
+        ]
+        projection = {countries.COUNTRY_CODE: 1, countries.COUNTRY_NAME: 1}
+        result = countries.get_country_dict(projection=projection)
+        mock_collection.find.assert_called_once_with({}, {'_id': 0, **projection})
+        assert result == {'US': {countries.COUNTRY_CODE: 'US', countries.COUNTRY_NAME: 'United States'}}
+
     def test_get_country_by_code(self):
         """Test getting a country by its code."""
         with patch('data.db_connect.read_one') as mock_read_one:
@@ -42,62 +61,109 @@ class TestCountries:
             mock_read_one.assert_called_once_with(countries.COUNTRIES_COLLECT, {countries.COUNTRY_NAME: 'United States'})
             assert result == countries.TEST_COUNTRY
 
-    def test_get_countries_by_continent(self):
+    def test_get_countries_by_continent(self, mock_collection):
         """Test getting countries by continent."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [countries.TEST_COUNTRY]
-            result = countries.get_countries_by_continent('North America')
-            mock_collection.find.assert_called_once_with({countries.CONTINENT: 'North America'})
-            assert result == [countries.TEST_COUNTRY]
+        mock_collection.find.return_value = [countries.TEST_COUNTRY]
+        result = countries.get_countries_by_continent('North America')
+        mock_collection.find.assert_called_once_with(
+            {countries.CONTINENT: 'North America'}, {'_id': 0}, batch_size=1000)
+        assert result == [countries.TEST_COUNTRY]
 
-    def test_get_countries_by_continent_empty(self):
+    def test_get_countries_by_continent_empty(self, mock_collection):
         """Test getting countries by continent returns empty list when none found."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = []
-            result = countries.get_countries_by_continent('Antarctica')
-            mock_collection.find.assert_called_once_with({countries.CONTINENT: 'Antarctica'})
-            assert result == []
-
-    def test_get_countries_by_population_range_min_only(self):
+        mock_collection.find.return_value = []
+        result = countries.get_countries_by_continent('Antarctica')
+        mock_collection.find.assert_called_once_with({countries.CONTINENT: 'Antarctica'}, {'_id': 0}, batch_size=1000)
+        assert result == []
+
+    def test_get_countries_by_population_range_min_only(self, mock_collection):
         """Test filtering by min population only builds $gte query."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [countries.TEST_COUNTRY]
-            result = countries.get_countries_by_population_range(min_pop=100000000)
-            mock_collection.find.assert_called_once_with({countries.POPULATION: {'$gte': 100000000}})
-            assert result == [countries.TEST_COUNTRY]
+        mock_collection.find.return_value = [countries.TEST_COUNTRY]
+        result = countries.get_countries_by_population_range(min_pop=100000000)
+        mock_collection.find.assert_called_once_with(
+            {countries.POPULATION: {'$gte': 100000000}}, {'_id': 0}, batch_size=1000)
+        assert result == [countries.TEST_COUNTRY]
 
-    def test_get_countries_by_population_range_max_only(self):
+    def test_get_countries_by_population_range_max_only(self, mock_collection):
         """Test filtering by max population only builds $lte query."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [countries.TEST_COUNTRY]
-            result = countries.get_countries_by_population_range(max_pop=500000000)
-            mock_collection.find.assert_called_once_with({countries.POPULATION: {'$lte': 500000000}})
-            assert result == [countries.TEST_COUNTRY]
+        mock_collection.find.return_value = [countries.TEST_COUNTRY]
+        result = countries.get_countries_by_population_range(max_pop=500000000)
+        mock_collection.find.assert_called_once_with(
+            {countries.POPULATION: {'$lte': 500000000}}, {'_id': 0}, batch_size=1000)
+        assert result == [countries.TEST_COUNTRY]
 
-    def test_get_countries_by_population_range(self):
+    def test_get_countries_by_population_range(self, mock_collection):
         """Test getting countries by population range."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [countries.TEST_COUNTRY]
-            result = countries.get_countries_by_population_range(min_pop=100000000, max_pop=500000000)
-            mock_collection.find.assert_called_once_with({
-                countries.POPULATION: {'$gte': 100000000, '$lte': 500000000}
-            })
-            assert result == [countries.TEST_COUNTRY]
+        mock_collection.find.return_value = [countries.TEST_COUNTRY]
+        result = countries.get_countries_by_population_range(min_pop=100000000, max_pop=500000000)
+        mock_collection.find.assert_called_once_with({
+            countries.POPULATION: {'$gte': 100000000, '$lte': 500000000}
+        }, {'_id': 0}, batch_size=1000)
+        assert result == [countries.TEST_COUNTRY]
 
-    def test_get_countries_by_population_range_no_filters(self):
+    def test_get_countries_by_population_range_no_filters(self, mock_collection):
         """Test getting countries by population range with no filters."""
-        with patch('data.db_connect.client') as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [countries.TEST_COUNTRY]
-            result = countries.get_countries_by_population_range()
-            mock_collection.find.assert_called_once_with({})
+        mock_collection.find.return_value = [countries.TEST_COUNTRY]
+        result = countries.get_countries_by_population_range()
+        mock_collection.find.assert_called_once_with({}, {'_id': 0}, batch_size=1000)
+        assert result == [countries.TEST_COUNTRY]
+
+    def test_get_countries_by_population_range_sorted_and_limited(self, mock_collection):
+        """Test sort and limit are applied by the server."""
+        cursor = mock_collection.find.return_value
+        cursor.sort.return_value.limit.return_value = [countries.TEST_COUNTRY]
+        result = countries.get_countries_by_population_range(
+            min_pop=1000, limit=5, sort=-1)
+        cursor.sort.assert_called_once_with([(countries.POPULATION, -1)])
+        cursor.sort.return_value.limit.assert_called_once_with(5)
+        assert result == [countries.TEST_COUNTRY]
+
+    def test_search_countries_by_name_partial_match(self):
+        """Test name search is a case-insensitive substring match."""
+        with patch('data.db_connect.read_filtered') as mock_read:
+            mock_read.return_value = [countries.TEST_COUNTRY]
+            result = countries.search_countries_by_name('  unit ')
+            mock_read.assert_called_once_with(
+                countries.COUNTRIES_COLLECT,
+                {countries.COUNTRY_NAME: {'$regex': 'unit', '$options': 'i'}},
+                limit=None)
             assert result == [countries.TEST_COUNTRY]
 
+    def test_search_countries_by_name_escapes_query(self):
+        """Test regex metacharacters in the query are matched literally."""
+        with patch('data.db_connect.read_filtered') as mock_read:
+            mock_read.return_value = []
+            countries.search_countries_by_name('St. (Kitts')
+            mock_read.assert_called_once_with(
+                countries.COUNTRIES_COLLECT,
+                {countries.COUNTRY_NAME: {'$regex': r'St\.\ \(Kitts', '$options': 'i'}},
+                limit=None)
+
+    def test_search_countries_by_name_limit(self):
+        """Test the search limit is applied to the cursor."""
+        with patch('data.db_connect.read_filtered') as mock_read:
+            mock_read.return_value = []
+            countries.search_countries_by_name('united', limit=3)
+            mock_read.assert_called_once_with(
+                countries.COUNTRIES_COLLECT,
+                {countries.COUNTRY_NAME: {'$regex': 'united', '$options': 'i'}},
+                limit=3)
+
+    def test_iter_countries_filtered_streams_cursor(self, mock_collection):
+        """Test the streaming read yields docs off a batched cursor."""
+        mock_collection.find.return_value.batch_size.return_value = [countries.TEST_COUNTRY]
+
+        result = countries.iter_countries_filtered(continent='Europe')
+        assert list(result) == [countries.TEST_COUNTRY]
+        mock_collection.find.assert_called_once_with(
+            {countries.CONTINENT: 'Europe'}, {'_id': 0})
+
+    def test_search_countries_by_name_blank(self):
+        """Test a blank query returns no results without a DB call."""
+        with patch('data.db_connect.read_filtered') as mock_read:
+            assert countries.search_countries_by_name('   ') == []
+            mock_read.assert_not_called()
+
     def test_add_country_success(self):
         """Test successfully adding a new country."""
         with patch('data.countries.get_country_by_code') as mock_get, \
@@ -141,12 +207,88 @@ class TestCountries:
             countries.add_country(invalid_country)
 
     def test_add_country_already_exists(self):
-        """Test adding a country that already exists."""
-        with patch('data.countries.get_country_by_code') as mock_get:
-            mock_get.return_value = countries.TEST_COUNTRY  # Country exists
-            
+        """Test adding a country code twice without the unique index."""
+        stored = []
+
+        def fake_create(collection, doc):
+            stored.append(dict(doc))
+            return MagicMock(acknowledged=True)
+
+        def fake_read_one(collection, filt, projection=None):
+            code = filt[countries.COUNTRY_CODE]
+            return next((doc for doc in stored if doc[countries.COUNTRY_CODE] == code), None)
+
+        with patch('data.db_connect.create', side_effect=fake_create), \
+             patch('data.db_connect.read_one', side_effect=fake_read_one):
+            assert countries.add_country(countries.TEST_COUNTRY.copy()) is True
+            # Nothing cached: the second check has to find the stored doc
+            country_by_code_cache.clear()
+            with pytest.raises(ValueError, match="already exists"):
+                countries.add_country(countries.TEST_COUNTRY.copy())
+        assert len(stored) == 1
+
+    def test_add_country_duplicate_key(self):
+        """Test a duplicate rejected by the unique index is reported."""
+        with patch('data.countries.country_exists', return_value=False), \
+             patch('data.db_connect.create') as mock_create:
+            # The unique index rejects the insert
+            mock_create.side_effect = DuplicateKeyError("E11000 duplicate key error")
+
             with pytest.raises(ValueError, match="already exists"):
-                countries.add_country(countries.TEST_COUNTRY)
+                countries.add_country(countries.TEST_COUNTRY.copy())
+
+    def test_add_countries_bulk_success(self):
+        """Test bulk add validates in Python and inserts with one call."""
+        batch = [countries.TEST_COUNTRY.copy(),
+                 {**countries.TEST_COUNTRY, countries.COUNTRY_CODE: ' ca '}]
+        with patch('data.db_connect.distinct', return_value=[]), \
+             patch('data.db_connect.create_many', return_value=2) as mock_create_many:
+            assert countries.add_countries_bulk(batch) == 2
+            mock_create_many.assert_called_once_with(
+                countries.COUNTRIES_COLLECT, batch, ordered=False)
+            assert batch[1][countries.COUNTRY_CODE] == 'CA'
+            assert batch[0]['created_at'] == batch[1]['created_at']
+
+    def test_add_countries_bulk_skips_existing_codes(self):
+        """Test stored codes and repeats within the batch are not inserted."""
+        batch = [{**countries.TEST_COUNTRY, countries.COUNTRY_CODE: 'US'},
+                 {**countries.TEST_COUNTRY, countries.COUNTRY_CODE: 'FR'},
+                 {**countries.TEST_COUNTRY, countries.COUNTRY_CODE: ' fr '}]
+        with patch('data.db_connect.distinct', return_value=['US']) as mock_distinct, \
+             patch('data.db_connect.create_many', return_value=1) as mock_create_many:
+            assert countries.add_countries_bulk(batch) == 1
+            mock_distinct.assert_called_once_with(
+                countries.COUNTRIES_COLLECT, countries.COUNTRY_CODE,
+                {countries.COUNTRY_CODE: {'$in': ['FR', 'US']}})
+            mock_create_many.assert_called_once_with(
+                countries.COUNTRIES_COLLECT, [batch[1]], ordered=False)
+
+    def test_add_countries_bulk_all_existing(self):
+        """Test a batch of stored codes makes no insert call."""
+        with patch('data.db_connect.distinct', return_value=['US']), \
+             patch('data.db_connect.create_many') as mock_create_many:
+            assert countries.add_countries_bulk([countries.TEST_COUNTRY.copy()]) == 0
+            mock_create_many.assert_not_called()
+
+    def test_add_countries_bulk_invalid_inserts_nothing(self):
+        """Test one invalid country rejects the whole batch."""
+        batch = [countries.TEST_COUNTRY.copy(),
+                 {**countries.TEST_COUNTRY, countries.CONTINENT: 'Atlantis'}]
+        with patch('data.db_connect.create_many') as mock_create_many:
+            with pytest.raises(ValueError, match="Invalid continent"):
+                countries.add_countries_bulk(batch)
+            mock_create_many.assert_not_called()
+
+    def test_update_countries_bulk(self):
+        """Test bulk update sends every update in one bulk write."""
+        updates = {'US': {countries.CAPITAL: '  Washington  '}, 'CA': {countries.POPULATION: 1}}
+        with patch('data.db_connect.update_bulk', return_value=2) as mock_update_bulk:
+            assert countries.update_countries_bulk(updates) == 2
+            mock_update_bulk.assert_called_once()
+            pairs = mock_update_bulk.call_args[0][1]
+            assert [f for f, _ in pairs] == [{countries.COUNTRY_CODE: 'US'}, {countries.COUNTRY_CODE: 'CA'}]
+            assert pairs[0][1][countries.CAPITAL] == 'Washington'
+            assert 'updated_at' in pairs[1][1]
 
     def test_update_country_success(self):
         """Test successfully updating a country."""
@@ -165,11 +307,20 @@ class TestCountries:
 
     def test_update_country_not_found(self):
         """Test updating a country that doesn't exist."""
-        with patch('data.countries.get_country_by_code') as mock_get:
-            mock_get.return_value = None  # Country doesn't exist
-            
+        with patch('data.db_connect.update') as mock_update:
+            mock_update.return_value = MagicMock(matched_count=0, modified_count=0)
+
             result = countries.update_country('XX', {})
             assert result is False
+            mock_update.assert_called_once()
+
+    def test_get_dependent_states_count_counts_in_db(self, mock_collection):
+        """Test dependent states are counted server-side, not loaded."""
+        mock_collection.count_documents.return_value = 4
+        result = countries.get_dependent_states_count('US')
+        mock_collection.count_documents.assert_called_once_with({countries.COUNTRY_CODE: 'US'})
+        mock_collection.find.assert_not_called()
+        assert result == 4
 
     def test_delete_country_success(self):
         """Test successfully deleting a country."""
@@ -198,18 +349,15 @@ class TestCountries:
 
     def test_can_delete_country_with_dependencies(self):
         """Test can_delete_country returns False when states exist."""
-        with patch('data.countries.get_country_delete_impact', return_value={
-            countries.COUNTRY_CODE: 'US',
-            'exists': True,
-            'states': 3,
-            'cities': 8,
-            'direct_dependency_count': 3,
-            'total_dependency_count': 11,
-            'blocked': True,
-        }):
-            can_delete, reason = countries.can_delete_country('US')
+        with patch('data.countries.get_dependent_states_count', return_value=3) as mock_count, \
+             patch('data.countries.get_dependent_cities_count') as mock_cities, \
+             patch('data.countries.get_country_by_code') as mock_get:
+            can_delete, reason = countries.can_delete_country('us')
             assert can_delete is False
             assert "3 state" in reason
+            mock_count.assert_called_once_with('US')
+            mock_cities.assert_not_called()
+            mock_get.assert_not_called()
 
     def test_can_delete_country_no_dependencies(self):
         """Test can_delete_country returns True when no states exist."""
@@ -261,20 +409,33 @@ class TestCountries:
 
     def test_country_exists_true(self):
         """Test checking if a country exists - returns True."""
-        with patch('data.countries.get_country_by_code') as mock_get:
-            mock_get.return_value = countries.TEST_COUNTRY
-            
-            result = countries.country_exists('US')
+        with patch('data.db_connect.read_one') as mock_read_one:
+            mock_read_one.return_value = {countries.COUNTRY_CODE: 'TC'}
+
+            result = countries.country_exists('tc')
             assert result is True
+            mock_read_one.assert_called_once_with(
+                countries.COUNTRIES_COLLECT, {countries.COUNTRY_CODE: 'TC'},
+                projection={'_id': 0, countries.COUNTRY_CODE: 1})
 
     def test_country_exists_false(self):
         """Test checking if a country exists - returns False."""
-        with patch('data.countries.get_country_by_code') as mock_get:
-            mock_get.return_value = None
-            
+        with patch('data.db_connect.read_one') as mock_read_one:
+            mock_read_one.return_value = None
+
             result = countries.country_exists('XX')
             assert result is False
 
+    def test_get_countries_by_population_range_fields(self, mock_collection):
+        """Test requested fields are forwarded as a projection."""
+        mock_collection.find.return_value = [{countries.COUNTRY_CODE: 'US'}]
+        result = countries.get_countries_by_population_range(
+            min_pop=1, fields=[countries.COUNTRY_CODE])
+        mock_collection.find.assert_called_once_with(
+            {countries.POPULATION: {'$gte': 1}},
+            {'_id': 0, countries.COUNTRY_CODE: 1}, batch_size=1000)
+        assert result == [{countries.COUNTRY_CODE: 'US'}]
+
     # Input Sanitization Tests
     def test_add_country_sanitizes_whitespace(self):
         """Test that add_country strips leading/trailing whitespace from strings."""
@@ -0,0 +1,151 @@
+"""
+Tests for the db_connect module.
+"""
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
+
+import data.db_connect as dbc
+
+
+class TestDbConnect:
+    """Test class for db_connect module."""
+
+    def test_ensure_connection_reconnects_without_closing_stale_client(self):
+        """Test a lost connection reconnects and retries once, leaving the old client open."""
+        stale = MagicMock()
+        fresh = MagicMock()
+        calls = []
+
+        @dbc.ensure_connection
+        def op():
+            calls.append(dbc.client)
+            if dbc.client is stale:
+                raise ConnectionFailure("lost")
+            return "ok"
+
+        with patch('data.db_connect.client', stale), \
+             patch('data.db_connect.connect_db', return_value=fresh):
+            assert op() == "ok"
+
+        assert calls == [stale, fresh]
+        stale.close.assert_not_called()
+
+    def test_read_excludes_id_on_server(self, mock_collection):
+        """Test _id is projected away by the server, not deleted per doc."""
+        mock_collection.find.return_value = [{'name': 'a'}]
+        assert dbc.read('things') == [{'name': 'a'}]
+        mock_collection.find.assert_called_once_with(
+            {}, {dbc.MONGO_ID: 0}, batch_size=dbc.DEFAULT_BATCH_SIZE)
+
+    def test_read_filtered_keeps_id_as_string(self, mock_collection):
+        """Test no_id=False leaves the projection alone and stringifies _id."""
+        mock_collection.find.return_value = [{dbc.MONGO_ID: 42, 'name': 'a'}]
+        result = dbc.read_filtered('things', {'name': 'a'}, no_id=False)
+        mock_collection.find.assert_called_once_with(
+            {'name': 'a'}, None, batch_size=dbc.DEFAULT_BATCH_SIZE)
+        assert result == [{dbc.MONGO_ID: '42', 'name': 'a'}]
+
+    def test_read_dict_keys_streamed_docs(self, mock_collection):
+        """Test read_dict keys docs from one projected, batched find."""
+        mock_collection.find.return_value.batch_size.return_value = [
+            {'code': 'A', 'n': 1}, {'code': 'B', 'n': 2}
+        ]
+        result = dbc.fetch_all_as_dict('code', 'things')
+        mock_collection.find.assert_called_once_with({}, {dbc.MONGO_ID: 0})
+        mock_collection.find.return_value.batch_size.assert_called_once_with(
+            dbc.DEFAULT_BATCH_SIZE)
+        assert result == {'A': {'code': 'A', 'n': 1}, 'B': {'code': 'B', 'n': 2}}
+
+    def test_read_iter_reconnects_when_find_fails(self):
+        """Test a ConnectionFailure from find in read_iter triggers a reconnect."""
+        stale = MagicMock()
+        stale.__getitem__.return_value.__getitem__.return_value.find.side_effect = \
+            ConnectionFailure("lost")
+        fresh = MagicMock()
+        fresh_coll = fresh.__getitem__.return_value.__getitem__.return_value
+        fresh_coll.find.return_value.batch_size.return_value = [{'name': 'a'}]
+
+        with patch('data.db_connect.client', stale), \
+             patch('data.db_connect.connect_db', return_value=fresh):
+            assert list(dbc.read_iter('things')) == [{'name': 'a'}]
+
+        fresh_coll.find.assert_called_once_with({}, {dbc.MONGO_ID: 0})
+
+    def test_read_iter_keeps_id_as_string(self, mock_collection):
+        """Test no_id=False stringifies _id as docs are iterated."""
+        mock_collection.find.return_value.batch_size.return_value = [
+            {dbc.MONGO_ID: 1}, {dbc.MONGO_ID: 2}
+        ]
+        assert list(dbc.read_iter('things', no_id=False)) == [
+            {dbc.MONGO_ID: '1'}, {dbc.MONGO_ID: '2'}
+        ]
+
+    def test_read_iter_empty(self, mock_collection):
+        """Test read_iter yields nothing when no doc matches."""
+        mock_collection.find.return_value.batch_size.return_value = []
+        assert list(dbc.read_iter('things', {'name': 'x'})) == []
+
+    def test_fetch_all_as_dict_reconnects_mid_stream(self):
+        """Test a ConnectionFailure while iterating re-reads on a new client."""
+        def broken_cursor():
+            yield {'code': 'A'}
+            raise ConnectionFailure("lost")
+
+        stale = MagicMock()
+        stale_coll = stale.__getitem__.return_value.__getitem__.return_value
+        stale_coll.find.return_value.batch_size.return_value = broken_cursor()
+        fresh = MagicMock()
+        fresh_coll = fresh.__getitem__.return_value.__getitem__.return_value
+        fresh_coll.find.return_value.batch_size.return_value = [{'code': 'A'}, {'code': 'B'}]
+
+        with patch('data.db_connect.client', stale), \
+             patch('data.db_connect.connect_db', return_value=fresh):
+            result = dbc.fetch_all_as_dict('code', 'things')
+
+        assert result == {'A': {'code': 'A'}, 'B': {'code': 'B'}}
+
+    def test_create_many_unordered_skips_duplicates(self, mock_collection):
+        """Test an unordered insert reports how many docs got past duplicate keys."""
+        mock_collection.insert_many.side_effect = BulkWriteError({
+            'nInserted': 2, 'writeErrors': [{'code': dbc.DUPLICATE_KEY_ERROR}]})
+        assert dbc.create_many('things', [{}, {}, {}], ordered=False) == 2
+
+    def test_create_many_ordered_raises_on_duplicate(self, mock_collection):
+        """Test an ordered insert, which stops at the duplicate, is not swallowed."""
+        mock_collection.insert_many.side_effect = BulkWriteError({
+            'nInserted': 1, 'writeErrors': [{'code': dbc.DUPLICATE_KEY_ERROR}]})
+        with pytest.raises(BulkWriteError):
+            dbc.create_many('things', [{}, {}, {}])
+
+    def test_create_many_unordered_raises_other_errors(self, mock_collection):
+        """Test write errors other than duplicate keys are raised."""
+        mock_collection.insert_many.side_effect = BulkWriteError({
+            'nInserted': 0, 'writeErrors': [{'code': 121}]})
+        with pytest.raises(BulkWriteError):
+            dbc.create_many('things', [{}], ordered=False)
+
+    def test_update_bulk_single_bulk_write(self, mock_collection):
+        """Test update_bulk issues one unordered bulk_write of $set updates."""
+        mock_collection.bulk_write.return_value = MagicMock(modified_count=2)
+        result = dbc.update_bulk('things', [({'k': 1}, {'v': 1}), ({'k': 2}, {'v': 2})])
+        assert result == 2
+        mock_collection.bulk_write.assert_called_once_with(
+            [UpdateOne({'k': 1}, {'$set': {'v': 1}}), UpdateOne({'k': 2}, {'$set': {'v': 2}})],
+            ordered=False)
+
+    def test_read_one_uses_find_one(self, mock_collection):
+        """Test read_one asks the driver for a single doc and stringifies _id."""
+        mock_collection.find_one.return_value = {dbc.MONGO_ID: 7, 'name': 'a'}
+        result = dbc.read_one('things', {'name': 'a'}, projection={'name': 1})
+        mock_collection.find_one.assert_called_once_with({'name': 'a'}, {'name': 1})
+        mock_collection.find.assert_not_called()
+        assert result == {dbc.MONGO_ID: '7', 'name': 'a'}
+
+    def test_read_one_not_found(self, mock_collection):
+        """Test read_one returns None when nothing matches."""
+        mock_collection.find_one.return_value = None
+        assert dbc.read_one('things', {'name': 'zz'}) is None
@@ -12,6 +12,33 @@ from data.models import (
     states_validator,
 )
 
+CONTINENT_VALUES = frozenset(member.value for member in CONTINENT_ENUM)
+
+COUNTRIES_REQUIRED = [
+    "country_name",
+    "country_code",
+    "continent",
+    "capital",
+    "population",
+    "area_km2",
+]
+STATES_REQUIRED = [
+    "state_name",
+    "state_code",
+    "country_code",
+    "capital",
+    "population",
+    "area_km2",
+]
+CITIES_REQUIRED = [
+    "city_name",
+    "state_code",
+    "country_code",
+    "population",
+    "area_km2",
+    "coordinates",
+]
+
 
 class TestModels:
     """Test class for models module."""
@@ -25,7 +52,7 @@ class TestModels:
     def mock_db(self):
         """Mock MongoDB database fixture."""
         mock_db = MagicMock()
-        mock_db.list_collection_names.return_value = []
+        mock_db.list_collections.return_value = []
         mock_db.create_collection.return_value = None
         mock_db.command.return_value = None
         mock_db.get_collection.return_value = MagicMock()
@@ -38,15 +65,13 @@ class TestModels:
         mock_collection.create_index.return_value = None
         return mock_collection
 
-    @pytest.fixture(autouse=True)
-    def setup_patches(self, mock_client, mock_db, mock_collection):
-        """Set up patches for all database-related operations."""
-        with patch("data.models.connect_db", return_value=mock_client), patch.dict(
-            os.environ, {"DB_NAME": "test_db"}
-        ):
-            mock_client.__getitem__.return_value = mock_db
-            mock_db.get_collection.return_value = mock_collection
-            yield
+    @pytest.fixture
+    def db_patches(self, mock_client, mock_db, mock_collection, monkeypatch):
+        """Route get_db() to the mock database for tests that rely on it."""
+        monkeypatch.setattr("data.models.connect_db", lambda: mock_client)
+        monkeypatch.setenv("DB_NAME", "test_db")
+        mock_client.__getitem__.return_value = mock_db
+        mock_db.get_collection.return_value = mock_collection
 
     def test_continent_enum_values(self):
         """Test that CONTINENT_ENUM has all expected values."""
@@ -59,8 +84,7 @@ class TestModels:
             "Oceania",
             "South America",
         }
-        actual_continents = {continent.value for continent in CONTINENT_ENUM}
-        assert actual_continents == expected_continents
+        assert CONTINENT_VALUES == expected_continents
 
     def test_continent_enum_string_enum(self):
         """Test that CONTINENT_ENUM is a StrEnum."""
@@ -72,19 +96,11 @@ class TestModels:
         schema = countries_validator["$jsonSchema"]
 
         # Test required fields
-        expected_required = [
-            "country_name",
-            "country_code",
-            "continent",
-            "capital",
-            "population",
-            "area_km2",
-        ]
-        assert schema["required"] == expected_required
+        assert schema["required"] == COUNTRIES_REQUIRED
 
         # Test continent enum values
         continent_enum = schema["properties"]["continent"]["enum"]
-        assert set(continent_enum) == {member.value for member in CONTINENT_ENUM}
+        assert set(continent_enum) == CONTINENT_VALUES
 
         # Test country code pattern
         assert schema["properties"]["country_code"]["pattern"] == "^[A-Z]{2}$"
@@ -94,15 +110,7 @@ class TestModels:
         schema = states_validator["$jsonSchema"]
 
         # Test required fields
-        expected_required = [
-            "state_name",
-            "state_code",
-            "country_code",
-            "capital",
-            "population",
-            "area_km2",
-        ]
-        assert schema["required"] == expected_required
+        assert schema["required"] == STATES_REQUIRED
 
         # Test state and country code patterns
         assert schema["properties"]["state_code"]["pattern"] == "^[A-Z]{2}$"
@@ -113,15 +121,7 @@ class TestModels:
         schema = cities_validator["$jsonSchema"]
 
         # Test required fields
-        expected_required = [
-            "city_name",
-            "state_code",
-            "country_code",
-            "population",
-            "area_km2",
-            "coordinates",
-        ]
-        assert schema["required"] == expected_required
+        assert schema["required"] == CITIES_REQUIRED
 
         # Test coordinates structure
         coords = schema["properties"]["coordinates"]
@@ -131,9 +131,9 @@ class TestModels:
         assert coords["properties"]["longitude"]["minimum"] == -180
         assert coords["properties"]["longitude"]["maximum"] == 180
 
-    def test_ensure_collection_creates_new_collection(self, mock_db):
+    def test_ensure_collection_creates_new_collection(self, mock_db, db_patches):
         """Test ensure_collection creates a new collection when it doesn't exist."""
-        mock_db.list_collection_names.return_value = []
+        mock_db.list_collections.return_value = []
 
         ensure_collection("test_collection", {"test": "validator"})
 
@@ -145,9 +145,11 @@ class TestModels:
         )
         mock_db.command.assert_not_called()
 
-    def test_ensure_collection_updates_existing_collection(self, mock_db):
+    def test_ensure_collection_updates_existing_collection(self, mock_db, db_patches):
         """Test ensure_collection updates an existing collection."""
-        mock_db.list_collection_names.return_value = ["test_collection"]
+        mock_db.list_collections.return_value = [
+            {"name": "test_collection", "options": {}}
+        ]
 
         ensure_collection("test_collection", {"test": "validator"})
 
@@ -160,9 +162,35 @@ class TestModels:
             validationLevel="strict",
         )
 
+    def test_ensure_collection_skips_unchanged_validator(self, mock_db, db_patches):
+        """Test ensure_collection does not collMod when the validator matches."""
+        mock_db.list_collections.return_value = [
+            {
+                "name": "test_collection",
+                "options": {
+                    "validator": {"test": "validator"},
+                    "validationAction": "error",
+                    "validationLevel": "strict",
+                },
+            }
+        ]
+
+        ensure_collection("test_collection", {"test": "validator"})
+
+        mock_db.create_collection.assert_not_called()
+        mock_db.command.assert_not_called()
+
+    def test_schema_setup_lists_collections_once(self, mock_db):
+        """Test initialize_database_schema lists collections a single time."""
+        mock_db.list_collections.return_value = []
+
+        initialize_database_schema(db=mock_db)
+
+        mock_db.list_collections.assert_called_once_with()
+
     def test_collections_are_initialized_explicitly(self, mock_db):
         """Test that schema setup only happens when explicitly requested."""
-        mock_db.list_collection_names.return_value = []
+        mock_db.list_collections.return_value = []
 
         initialize_database_schema(db=mock_db)
 
@@ -199,70 +227,79 @@ class TestModels:
         ensure_indexes(db=mock_db)
 
         assert mock_db.get_collection.call_count == 4
-        assert mock_collection.create_index.call_count == 4
+        assert mock_collection.create_index.call_count == 13
+
+    def test_state_code_lookup_has_own_index(self, mock_db, mock_collection):
+        """Test that by-code state lookups are not left to the compound index."""
+        mock_db.get_collection.return_value = mock_collection
+
+        ensure_indexes(db=mock_db)
+
+        mock_collection.create_index.assert_any_call(
+            "state_code", unique=True, name="uniq_state_code"
+        )
+
+    def test_state_population_range_has_country_prefix(self, mock_db, mock_collection):
+        """Test that country-scoped state population ranges are indexed."""
+        mock_db.get_collection.return_value = mock_collection
+
+        ensure_indexes(db=mock_db)
+
+        mock_collection.create_index.assert_any_call(
+            [("country_code", 1), ("population", 1)], name="country_pop"
+        )
+
+    def test_city_lookup_indexes_match_query_shapes(self, mock_db, mock_collection):
+        """Test that the hot city lookups are backed by indexes."""
+        mock_db.get_collection.return_value = mock_collection
+
+        ensure_indexes(db=mock_db)
+
+        mock_collection.create_index.assert_any_call(
+            [("city_name", 1), ("state_code", 1)], name="city_name_state_code"
+        )
+        mock_collection.create_index.assert_any_call(
+            [("city_name", 1), ("country_code", 1)], name="city_name_country_code"
+        )
+        mock_collection.create_index.assert_any_call(
+            "state_code", name="city_state_code"
+        )
 
     @pytest.mark.parametrize(
         "validator,expected_required",
         [
-            (
-                countries_validator,
-                [
-                    "country_name",
-                    "country_code",
-                    "continent",
-                    "capital",
-                    "population",
-                    "area_km2",
-                ],
-            ),
-            (
-                states_validator,
-                [
-                    "state_name",
-                    "state_code",
-                    "country_code",
-                    "capital",
-                    "population",
-                    "area_km2",
-                ],
-            ),
-            (
-                cities_validator,
-                [
-                    "city_name",
-                    "state_code",
-                    "country_code",
-                    "population",
-                    "area_km2",
-                    "coordinates",
-                ],
-            ),
+            (countries_validator, COUNTRIES_REQUIRED),
+            (states_validator, STATES_REQUIRED),
+            (cities_validator, CITIES_REQUIRED),
         ],
+        ids=["countries", "states", "cities"],
     )
     def test_validator_required_fields(self, validator, expected_required):
         """Test that validators have correct required fields."""
         assert validator["$jsonSchema"]["required"] == expected_required
 
-    def test_ensure_collection_with_database_error(self, mock_db):
+    def test_ensure_collection_with_database_error(self, mock_db, db_patches):
         """Test ensure_collection handles database errors properly."""
-        mock_db.list_collection_names.side_effect = Exception(
+        mock_db.list_collections.side_effect = Exception(
             "Database connection error"
         )
 
         with pytest.raises(Exception, match="Database connection error"):
             ensure_collection("test_collection", {"test": "validator"})
 
-    def test_ensure_collection_create_collection_error(self, mock_db):
+    def test_ensure_collection_create_collection_error(self, mock_db, db_patches):
         """Test ensure_collection handles create_collection errors."""
-        mock_db.list_collection_names.return_value = []
+        mock_db.list_collections.return_value = []
         mock_db.create_collection.side_effect = Exception("Create collection error")
 
         with pytest.raises(Exception, match="Create collection error"):
             ensure_collection("test_collection", {"test": "validator"})
 
-    def test_ensure_collection_command_error(self, mock_db):
+    def test_ensure_collection_command_error(self, mock_db, db_patches):
         """Test ensure_collection handles command errors for existing collections."""
-        mock_db.list_collection_names.return_value = ["test_collection"]
+        mock_db.list_collections.return_value = [
+            {"name": "test_collection", "options": {}}
+        ]
         mock_db.command.side_effect = Exception("Command error")
 
         with pytest.raises(Exception, match="Command error"):
@@ -3,16 +3,36 @@ Tests for the states data module.
 """
 
 from datetime import datetime
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
+from pymongo.errors import DuplicateKeyError
 
 from data import states as S
+from data.cache import state_list_cache
+
+
+# update_state/add_state only read these, so the module shares one of each
+@pytest.fixture(scope="module")
+def mock_successful_insert():
+    """Stand-in result for successful insert."""
+    return SimpleNamespace(acknowledged=True)
+
+
+@pytest.fixture(scope="module")
+def mock_modified_result():
+    """Stand-in result for successful update."""
+    return SimpleNamespace(matched_count=1, modified_count=1)
 
 
 class TestStates:
     """Test class for states module."""
 
+    def setup_method(self):
+        # get_states/get_state_dict are cached across calls
+        state_list_cache.clear()
+
     # ===== Fixtures =====
     @pytest.fixture
     def sample_state(self):
@@ -26,20 +46,6 @@ class TestStates:
             S.AREA_KM2: 141297,
         }
 
-    @pytest.fixture
-    def mock_successful_insert(self):
-        """Mock for successful insert."""
-        result = MagicMock()
-        result.acknowledged = True
-        return result
-
-    @pytest.fixture
-    def mock_modified_result(self):
-        """Mock for successful update."""
-        result = MagicMock()
-        result.modified_count = 1
-        return result
-
     # ===== Read operations tests =====
 
     def test_get_states(self):
@@ -47,7 +53,9 @@ class TestStates:
         with patch("data.db_connect.read") as mock_read:
             mock_read.return_value = [S.TEST_STATE]
             result = S.get_states()
-            mock_read.assert_called_once_with(S.STATES_COLLECT)
+            mock_read.assert_called_once_with(
+                S.STATES_COLLECT, projection=S.LIST_PROJECTION
+            )
             assert result == [S.TEST_STATE]
 
     def test_get_state_dict(self):
@@ -79,61 +87,81 @@ class TestStates:
             )
             assert result == S.TEST_STATE
 
-    def test_get_states_by_country(self):
+    def test_get_states_by_country(self, mock_collection):
         """Test getting states by country."""
-        with patch("data.db_connect.client") as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [S.TEST_STATE]
-            result = S.get_states_by_country("US")
-            mock_collection.find.assert_called_once_with({S.COUNTRY_CODE: "US"})
-            assert result == [S.TEST_STATE]
-
-    def test_get_states_by_population_range_min_only(self):
+        mock_collection.find.return_value = [S.TEST_STATE]
+        result = S.get_states_by_country("US")
+        mock_collection.find.assert_called_once_with(
+            {S.COUNTRY_CODE: "US"}, {"_id": 0, **S.LIST_PROJECTION}, batch_size=1000
+        )
+        assert result == [S.TEST_STATE]
+
+    def test_get_states_by_population_range_min_only(self, mock_collection):
         """Test filtering by min population only builds $gte query."""
-        with patch("data.db_connect.client") as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [S.TEST_STATE]
-            result = S.get_states_by_population_range(min_pop=100)
-            mock_collection.find.assert_called_once_with({S.POPULATION: {"$gte": 100}})
-            assert result == [S.TEST_STATE]
-
-    def test_get_states_by_population_range_max_only(self):
+        mock_collection.find.return_value = [S.TEST_STATE]
+        result = S.get_states_by_population_range(min_pop=100)
+        mock_collection.find.assert_called_once_with(
+            {S.POPULATION: {"$gte": 100}}, {"_id": 0, **S.LIST_PROJECTION}, batch_size=1000
+        )
+        assert result == [S.TEST_STATE]
+
+    def test_get_states_by_population_range_max_only(self, mock_collection):
         """Test filtering by max population only builds $lte query."""
-        with patch("data.db_connect.client") as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [S.TEST_STATE]
-            result = S.get_states_by_population_range(max_pop=1000)
-            mock_collection.find.assert_called_once_with({S.POPULATION: {"$lte": 1000}})
-            assert result == [S.TEST_STATE]
-
-    def test_get_states_by_country_empty(self):
+        mock_collection.find.return_value = [S.TEST_STATE]
+        result = S.get_states_by_population_range(max_pop=1000)
+        mock_collection.find.assert_called_once_with(
+            {S.POPULATION: {"$lte": 1000}}, {"_id": 0, **S.LIST_PROJECTION}, batch_size=1000
+        )
+        assert result == [S.TEST_STATE]
+
+    def test_get_states_by_country_empty(self, mock_collection):
         """Test getting states by country returns empty list when none found."""
-        with patch("data.db_connect.client") as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = []
-            result = S.get_states_by_country("XX")
-            mock_collection.find.assert_called_once_with({S.COUNTRY_CODE: "XX"})
-            assert result == []
-
-    def test_get_states_by_population_range(self):
+        mock_collection.find.return_value = []
+        result = S.get_states_by_country("XX")
+        mock_collection.find.assert_called_once_with(
+            {S.COUNTRY_CODE: "XX"}, {"_id": 0, **S.LIST_PROJECTION}, batch_size=1000
+        )
+        assert result == []
+
+    def test_get_states_by_population_range(self, mock_collection):
         """Test getting states by population range."""
-        with patch("data.db_connect.client") as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [S.TEST_STATE]
-            result = S.get_states_by_population_range(min_pop=1000000, max_pop=50000000)
-            mock_collection.find.assert_called_once_with(
-                {S.POPULATION: {"$gte": 1000000, "$lte": 50000000}}
-            )
-            assert result == [S.TEST_STATE]
-
-    def test_get_states_by_population_range_no_filters(self):
+        mock_collection.find.return_value = [S.TEST_STATE]
+        result = S.get_states_by_population_range(min_pop=1000000, max_pop=50000000)
+        mock_collection.find.assert_called_once_with(
+            {S.POPULATION: {"$gte": 1000000, "$lte": 50000000}}, {"_id": 0, **S.LIST_PROJECTION}, batch_size=1000
+        )
+        assert result == [S.TEST_STATE]
+
+    def test_get_states_by_population_range_in_country(self, mock_collection):
+        """Test scoping a population range to one country."""
+        mock_collection.find.return_value = [S.TEST_STATE]
+        result = S.get_states_by_population_range(min_pop=100, country_code="us")
+        mock_collection.find.assert_called_once_with(
+            {S.COUNTRY_CODE: "US", S.POPULATION: {"$gte": 100}},
+            {"_id": 0, **S.LIST_PROJECTION},
+            batch_size=1000,
+        )
+        assert result == [S.TEST_STATE]
+
+    def test_iter_states_filtered_streams_cursor(self, mock_collection):
+        """Test the streaming read yields docs off a batched cursor."""
+        mock_collection.find.return_value.batch_size.return_value = [S.TEST_STATE]
+
+        result = S.iter_states_filtered(country_code=" us ")
+        assert list(result) == [S.TEST_STATE]
+        mock_collection.find.assert_called_once_with(
+            {S.COUNTRY_CODE: "US"}, {"_id": 0, **S.LIST_PROJECTION}
+        )
+        mock_collection.find.return_value.batch_size.assert_called_once_with(1000)
+
+    def test_get_states_by_population_range_no_filters(self, mock_collection):
         """Test getting states by population range with no filters."""
-        with patch("data.db_connect.client") as mock_client:
-            mock_collection = mock_client.__getitem__().__getitem__()
-            mock_collection.find.return_value = [S.TEST_STATE]
-            result = S.get_states_by_population_range()
-            mock_collection.find.assert_called_once_with({})
-            assert result == [S.TEST_STATE]
+        mock_collection.find.return_value = [S.TEST_STATE]
+        result = S.get_states_by_population_range()
+        mock_collection.find.assert_called_once_with(
+            {}, {"_id": 0, **S.LIST_PROJECTION}, batch_size=1000
+        )
+        assert result == [S.TEST_STATE]
 
     # ===== Create operations tests =====
 
@@ -159,9 +187,19 @@ class TestStates:
             S.add_state(incomplete)
 
     def test_add_state_exists(self, sample_state):
-        """Test adding a state that already exists."""
-        with patch("data.states.get_state_by_code") as mock_get:
-            mock_get.return_value = sample_state
+        """Test adding a state whose code is already stored."""
+        with patch("data.states.get_state_by_code", return_value=S.TEST_STATE), \
+                patch("data.db_connect.create") as mock_create:
+            with pytest.raises(ValueError, match="already exists"):
+                S.add_state(sample_state)
+            mock_create.assert_not_called()
+
+    def test_add_state_duplicate_key(self, sample_state):
+        """Test a duplicate rejected by the unique index is reported."""
+        with patch("data.states.get_state_by_code", return_value=None), \
+                patch("data.db_connect.create") as mock_create:
+            # The unique index rejects the insert
+            mock_create.side_effect = DuplicateKeyError("E11000 duplicate key error")
             with pytest.raises(ValueError, match="already exists"):
                 S.add_state(sample_state)
 
@@ -187,6 +225,47 @@ class TestStates:
             with pytest.raises(ValueError, match="Population cannot be negative"):
                 S.add_state(invalid_state)
 
+    def test_add_states_bulk_success(self, sample_state):
+        """Test bulk add sanitizes in Python and inserts with one call."""
+        batch = [sample_state, {**sample_state, S.STATE_CODE: " ca "}]
+        with patch("data.states.get_states_by_codes", return_value={}), \
+                patch("data.db_connect.create_many", return_value=2) as mock_create_many:
+            assert S.add_states_bulk(batch) == 2
+            mock_create_many.assert_called_once_with(S.STATES_COLLECT, batch, ordered=False)
+            assert batch[1][S.STATE_CODE] == "CA"
+            assert batch[0]["created_at"] == batch[1]["created_at"]
+
+    def test_add_states_bulk_skips_existing_codes(self, sample_state):
+        """Test stored codes and repeats within the batch are not inserted."""
+        batch = [
+            {**sample_state, S.STATE_CODE: "NY"},
+            {**sample_state, S.STATE_CODE: "CA"},
+            {**sample_state, S.STATE_CODE: " ca "},
+        ]
+        with patch("data.states.get_states_by_codes",
+                   return_value={"NY": S.TEST_STATE}) as mock_get, \
+                patch("data.db_connect.create_many", return_value=1) as mock_create_many:
+            assert S.add_states_bulk(batch) == 1
+            assert sorted(mock_get.call_args[0][0]) == ["CA", "CA", "NY"]
+            mock_create_many.assert_called_once_with(
+                S.STATES_COLLECT, [batch[1]], ordered=False)
+
+    def test_add_states_bulk_all_existing(self, sample_state):
+        """Test a batch of stored codes makes no insert call."""
+        with patch("data.states.get_states_by_codes",
+                   return_value={"NY": S.TEST_STATE}), \
+                patch("data.db_connect.create_many") as mock_create_many:
+            assert S.add_states_bulk([sample_state]) == 0
+            mock_create_many.assert_not_called()
+
+    def test_add_states_bulk_invalid_inserts_nothing(self, sample_state):
+        """Test one invalid state rejects the whole batch."""
+        batch = [sample_state, {**sample_state, S.AREA_KM2: -1}]
+        with patch("data.db_connect.create_many") as mock_create_many:
+            with pytest.raises(ValueError, match="Area cannot be negative"):
+                S.add_states_bulk(batch)
+            mock_create_many.assert_not_called()
+
     # ===== Update operations tests =====
 
     def test_update_state_success(self, sample_state, mock_modified_result):
@@ -200,9 +279,10 @@ class TestStates:
 
     def test_update_state_not_found(self):
         """Test updating a state that does not exist."""
-        with patch("data.states.get_state_by_code") as mock_get:
-            mock_get.return_value = None
+        with patch("data.db_connect.update") as mock_update:
+            mock_update.return_value = MagicMock(matched_count=0, modified_count=0)
             assert S.update_state("XX", {}) is False
+            mock_update.assert_called_once()
 
     def test_update_state_strips_code_from_update(
         self, sample_state, mock_modified_result
@@ -282,21 +362,23 @@ class TestStates:
             mock_can_delete.assert_called_once_with("NY")
 
     def test_can_delete_state_with_dependencies(self):
-        """Test can_delete_state returns False when delete impact is blocked."""
+        """Test can_delete_state returns False when cities depend on the state."""
         with patch(
-            "data.states.get_state_delete_impact",
-            return_value={
-                S.STATE_CODE: "NY",
-                "exists": True,
-                "cities": 5,
-                "direct_dependency_count": 5,
-                "total_dependency_count": 5,
-                "blocked": True,
-            },
-        ):
-            can_delete, reason = S.can_delete_state("NY")
+            "data.states.get_dependent_cities_count", return_value=5
+        ) as mock_count, patch("data.states.get_state_by_code") as mock_get:
+            can_delete, reason = S.can_delete_state("ny")
             assert can_delete is False
             assert "5 city" in reason
+            mock_count.assert_called_once_with("NY")
+            mock_get.assert_not_called()
+
+    def test_get_dependent_cities_count_counts_in_db(self, mock_collection):
+        """Test dependent cities are counted server-side, not loaded."""
+        mock_collection.count_documents.return_value = 3
+        result = S.get_dependent_cities_count("NY")
+        mock_collection.count_documents.assert_called_once_with({"state_code": "NY"})
+        mock_collection.find.assert_not_called()
+        assert result == 3
 
     def test_can_delete_state_no_dependencies(self):
         """Test can_delete_state returns True when no cities exist."""
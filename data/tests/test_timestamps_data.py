@@ -16,7 +16,7 @@ class TestCityTimestamps:
     @patch('data.cities.dbc.create')
     @patch('data.states.state_exists', return_value=True)
     @patch('data.countries.country_exists', return_value=True)
-    @patch('data.cities.get_city_by_name_and_state', return_value=None)
+    @patch('data.cities.dbc.exists', return_value=False)
     def test_add_city_sets_timestamps(
             self,
             mock_get_city,
@@ -59,14 +59,14 @@ class TestCityTimestamps:
 
     @freeze_time("2025-02-20 14:45:30")
     @patch('data.cities.dbc.update')
-    @patch('data.cities.get_city_by_name_and_state')
+    @patch('data.cities.city_exists')
     def test_update_city_sets_updated_at(
             self,
             mock_get_city,
             mock_update):
         """Test that update_city sets updated_at as a datetime object"""
         # Setup mocks
-        mock_get_city.return_value = {'city_name': 'Test City'}
+        mock_get_city.return_value = True
         mock_result = MagicMock()
         mock_result.modified_count = 1
         mock_update.return_value = mock_result
@@ -97,7 +97,7 @@ class TestCityTimestamps:
     @patch('data.cities.dbc.create')
     @patch('data.states.state_exists', return_value=True)
     @patch('data.countries.country_exists', return_value=True)
-    @patch('data.cities.get_city_by_name_and_state', return_value=None)
+    @patch('data.cities.dbc.exists', return_value=False)
     def test_add_city_strips_user_provided_timestamps(
             self,
             mock_get_city,
@@ -370,7 +370,7 @@ class TestTimestampConsistency:
     @patch('data.cities.dbc.create')
     @patch('data.states.state_exists', return_value=True)
     @patch('data.countries.country_exists', return_value=True)
-    @patch('data.cities.get_city_by_name_and_state', return_value=None)
+    @patch('data.cities.dbc.exists', return_value=False)
     def test_add_city_created_and_updated_same(
             self,
             mock_get_city,
@@ -3,6 +3,8 @@ Shared utility functions for data layer operations.
 """
 import re
 
+_WHITESPACE_RUN = re.compile(r'\s+')
+
 
 def sanitize_string(value: str) -> str:
     """
@@ -17,7 +19,7 @@ def sanitize_string(value: str) -> str:
     if not isinstance(value, str):
         return value
     # Strip leading/trailing whitespace and collapse multiple spaces to single space
-    return re.sub(r'\s+', ' ', value.strip())
+    return _WHITESPACE_RUN.sub(' ', value.strip())
 
 
 def sanitize_code(value: str) -> str:
@@ -164,8 +164,8 @@ class CitiesList(Resource):
         )
 
         try:
-            # Replaces the if/elif block
-            data = cities_data.get_cities_filtered(
+            # Stream off the cursor so only the requested page is kept
+            data = cities_data.iter_cities_filtered(
                 name=name_query,
                 state_code=state_code,
                 country_code=country_code,
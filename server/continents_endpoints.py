@@ -8,7 +8,7 @@ from flask_restx import Resource, fields, Namespace, reqparse
 from http import HTTPStatus
 
 import data.continents as continents_data
-from data.countries import VALID_CONTINENTS
+from data.countries import VALID_CONTINENTS, VALID_CONTINENT_SET
 from server.helpers import apply_pagination, validate_pagination
 
 continents_ns = Namespace("continents", description="Continent operations")
@@ -101,7 +101,7 @@ class ContinentsList(Resource):
         """Create a new continent."""
         continent_data = request.json
 
-        if continent_data.get("continent_name") not in VALID_CONTINENTS:
+        if continent_data.get("continent_name") not in VALID_CONTINENT_SET:
             continents_ns.abort(
                 HTTPStatus.BAD_REQUEST,
                 f"Invalid continent. Must be one of: {VALID_CONTINENTS}",
@@ -9,7 +9,7 @@ from http import HTTPStatus
 
 import data.countries as countries_data
 import data.states as states_data
-from data.countries import VALID_CONTINENTS
+from data.countries import VALID_CONTINENTS, VALID_CONTINENT_SET
 from security import require_protocol
 from server.states_endpoints import state_model
 from server.helpers import apply_pagination, validate_pagination
@@ -298,7 +298,7 @@ class CountriesList(Resource):
         validate_pagination(limit, offset, countries_ns.abort)
 
         try:
-            data = countries_data.get_countries_filtered(
+            data = countries_data.iter_countries_filtered(
                 name=name, continent=continent, min_pop=min_pop, max_pop=max_pop
             )
             data = apply_pagination(data, limit, offset)
@@ -323,7 +323,7 @@ class CountriesList(Resource):
         country_data = request.json
 
         # Validate continent
-        if country_data.get("continent") not in VALID_CONTINENTS:
+        if country_data.get("continent") not in VALID_CONTINENT_SET:
             countries_ns.abort(
                 HTTPStatus.BAD_REQUEST,
                 f"Invalid continent. Must be one of: {VALID_CONTINENTS}",
@@ -455,7 +455,7 @@ class Country(Resource):
         # Validate continent if provided
         if (
             "continent" in update_data
-            and update_data["continent"] not in VALID_CONTINENTS
+            and update_data["continent"] not in VALID_CONTINENT_SET
         ):
             countries_ns.abort(
                 HTTPStatus.BAD_REQUEST,
@@ -540,7 +540,7 @@ class CountriesByContinent(Resource):
         Returns all countries in the specified continent.
         """
         # Validate continent
-        if continent_name not in VALID_CONTINENTS:
+        if continent_name not in VALID_CONTINENT_SET:
             countries_ns.abort(
                 HTTPStatus.BAD_REQUEST,
                 f"Invalid continent. Must be one of: {VALID_CONTINENTS}",
@@ -7,6 +7,7 @@ Provides:
 """
 
 from http import HTTPStatus
+from itertools import islice
 from typing import Any, Iterable, Tuple, TypeVar
 
 from flask import jsonify
@@ -42,14 +43,12 @@ def apply_pagination(
     """
     Apply simple offset/limit pagination to a sequence or iterable.
 
-    Converts input to a list so results can be reused safely.
+    Iterables are only consumed up to the end of the requested page, and
+    the page is returned as a list so results can be reused safely.
     """
-    items = list(results)
-    if offset:
-        items = items[offset:]
-    if limit:
-        items = items[:limit]
-    return items
+    start = offset or 0
+    stop = start + limit if limit else None
+    return list(islice(results, start, stop))
 
 
 def validate_pagination(
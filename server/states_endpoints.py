@@ -213,8 +213,8 @@ class StatesList(Resource):
         )
 
         try:
-            # Replaces the if/elif block
-            states = states_data.get_states_filtered(
+            # Stream off the cursor so only the requested page is materialized
+            states = states_data.iter_states_filtered(
                 name=state_name,
                 country_code=country_code,
                 min_pop=min_pop,
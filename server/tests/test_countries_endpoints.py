@@ -60,7 +60,7 @@ class TestCountriesEndpoints:
 
     def test_get_all_countries_success(self, client):
         """Test successful retrieval of all countries."""
-        with patch('data.countries.get_countries_filtered') as mock_get:
+        with patch('data.countries.iter_countries_filtered') as mock_get:
             mock_get.return_value = [countries.TEST_COUNTRY]
             response = client.get('/countries')
             assert response.status_code == HTTPStatus.OK
@@ -73,7 +73,7 @@ class TestCountriesEndpoints:
         second_country = {
             **countries.TEST_COUNTRY,
             countries.COUNTRY_CODE: 'ZZ'}
-        with patch('data.countries.get_countries_filtered') as mock_get:
+        with patch('data.countries.iter_countries_filtered') as mock_get:
             mock_get.return_value = [countries.TEST_COUNTRY, second_country]
             response = client.get('/countries?limit=1&offset=1')
             assert response.status_code == HTTPStatus.OK
@@ -88,7 +88,7 @@ class TestCountriesEndpoints:
 
     def test_get_all_countries_database_error(self, client):
         """Test database error when retrieving countries."""
-        with patch('data.countries.get_countries_filtered') as mock_get:
+        with patch('data.countries.iter_countries_filtered') as mock_get:
             mock_get.side_effect = Exception("Database connection failed")
             response = client.get('/countries')
             assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
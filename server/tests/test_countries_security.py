@@ -104,7 +104,7 @@ def test_delete_country_with_admin_role_is_allowed(enforced_client):
 
 
 def test_get_countries_remains_open_under_enforcement(enforced_client):
-    with patch("data.countries.get_countries_filtered") as mock_get:
+    with patch("data.countries.iter_countries_filtered") as mock_get:
         mock_get.return_value = []
         response = enforced_client.get("/countries")
     assert response.status_code == HTTPStatus.OK
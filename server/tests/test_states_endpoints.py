@@ -32,7 +32,7 @@ class TestStatesEndpoints:
         }
 
     def test_get_all_states_success(self, client):
-        with patch('data.states.get_states_filtered') as mock_get:
+        with patch('data.states.iter_states_filtered') as mock_get:
             mock_get.return_value = [states_data.TEST_STATE]
 
             resp = client.get('/states')
@@ -47,7 +47,7 @@ class TestStatesEndpoints:
     def test_get_states_with_pagination(self, client):
         """GET /states respects limit and offset query params."""
         another_state = {**states_data.TEST_STATE, 'state_code': 'CA'}
-        with patch('data.states.get_states_filtered') as mock_get:
+        with patch('data.states.iter_states_filtered') as mock_get:
             mock_get.return_value = [states_data.TEST_STATE, another_state]
 
             resp = client.get('/states?limit=1&offset=1')